@@ -0,0 +1,6 @@
+"""
+性能計測用のベンチマークスクリプト。
+
+リポジトリのルートから python -m benchmarks.<スクリプト名> で実行する。
+計測は一時ディレクトリに作成したデータベースで行い、database.db には触れない。
+"""
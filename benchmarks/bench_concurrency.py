@@ -0,0 +1,133 @@
+"""
+書き込み中の読み込みスループットを PRAGMA の設定ごとに計測するベンチマーク。
+
+    python -m benchmarks.bench_concurrency --readers 4 --seconds 5
+
+1つのスレッドが成績の更新を繰り返している間に、複数のスレッドが成績一覧の検索を行い、
+「従来の設定（rollback journal）」と Config.SQLITE_PRAGMAS の読み込み件数・ロックエラー数を比較する。
+"""
+import argparse
+import random
+import threading
+import time
+
+from peewee import OperationalError
+
+from models import Grade
+from utils import Config, db
+from .common import temporary_database
+
+# 変更前の設定（rollback journal、既定の synchronous、ロック待ちなし）
+LEGACY_PRAGMAS = {
+    'foreign_keys': 1,
+    'journal_mode': 'delete',
+    'busy_timeout': 0,
+}
+
+
+def populate(students: int, subjects: int):
+    """
+    成績テーブルを作成し、学生ごとに全科目の成績を投入する。
+    """
+    Grade.create_table(safe=True)
+    rows = [
+        (f"STU{s:05d}", subject_id, 2, random.randint(0, 100))
+        for s in range(students)
+        for subject_id in range(1, subjects + 1)
+    ]
+    with db.atomic():
+        db.connection().executemany(
+            "INSERT INTO grades (student_id, subject_id, unit, score) VALUES (?, ?, ?, ?)", rows
+        )
+
+
+def run(pragmas: dict, readers: int, seconds: float, students: int, subjects: int) -> dict:
+    """
+    指定した PRAGMA で書き込み1スレッド・読み込み複数スレッドを同時に動かす。
+
+    Returns:
+        dict: {reads, writes, read_errors, write_errors, reads_per_sec}
+    """
+    with temporary_database(pragmas=pragmas):
+        populate(students, subjects)
+        db.close()
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+        lock = threading.Lock()
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def writer():
+            rnd = random.Random(1)
+            while not stop.is_set():
+                try:
+                    with db.atomic():
+                        (Grade
+                         .update(score=rnd.randint(0, 100))
+                         .where(Grade.student_id == f"STU{rnd.randrange(students):05d}")
+                         .execute())
+                    count("writes")
+                except OperationalError:
+                    count("write_errors")
+            db.close()
+
+        def reader(seed):
+            rnd = random.Random(seed)
+            while not stop.is_set():
+                try:
+                    list(Grade
+                         .select()
+                         .where(Grade.student_id == f"STU{rnd.randrange(students):05d}")
+                         .order_by(Grade.subject_id))
+                    count("reads")
+                except OperationalError:
+                    count("read_errors")
+            db.close()
+
+        threads = [threading.Thread(target=writer)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    counts["reads_per_sec"] = round(counts["reads"] / seconds, 1)
+    return counts
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="同時アクセスのベンチマーク")
+    parser.add_argument("--readers", type=int, default=4, help="読み込みスレッド数（例: 4）")
+    parser.add_argument("--seconds", type=float, default=5.0, help="各設定の計測時間（秒）")
+    parser.add_argument("--students", type=int, default=2000, help="学生の数（例: 2000）")
+    parser.add_argument("--subjects", type=int, default=20, help="学生ごとの成績数（例: 20）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    profiles = {
+        "従来の設定": LEGACY_PRAGMAS,
+        "Config.SQLITE_PRAGMAS": Config.SQLITE_PRAGMAS,
+    }
+    print(f"{'設定':<24}{'読込/秒':>10}{'書込':>8}{'読込エラー':>12}{'書込エラー':>12}")
+    for name, pragmas in profiles.items():
+        result = run(pragmas, args.readers, args.seconds, args.students, args.subjects)
+        print(f"{name:<24}{result['reads_per_sec']:>10}{result['writes']:>8}"
+              f"{result['read_errors']:>12}{result['write_errors']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+主要なエンドポイントの応答時間を、データ量ごとに Flask のテストクライアントで計測するベンチマーク。
+
+    python -m benchmarks.bench_endpoints --scales 1000 10000 100000 --output result.json
+
+規模ごとに init_db の生成処理で一時データベースを作り、管理者・教員・学生でログインして
+各エンドポイントの p50/p95・SQL の実行回数と時間・メモリのピークを計測する。
+結果は JSON で出力するため、コミット間で比較できる。
+"""
+import argparse
+import contextlib
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from flask import request_finished
+
+from utils import db, flush_audit, request_sql_stats
+from .common import measure, temporary_database
+
+# (ロール, ユーザーID, パスワード)
+ACCOUNTS = [
+    ("admin", "admin", "admin"),
+    ("teacher", "TEA001", "password123"),
+    ("student", "STU001", "password123"),
+]
+
+# {ロール: 計測する URL のリスト}（{subject_id} は科目IDに置き換える）
+ENDPOINTS = {
+    "admin": [
+        "/grade/list",
+        "/grade/list?filter=fail",
+        "/grade/list?subject={subject_id}&filter=pass",
+        "/grade/list?student_number=STU00",
+        "/analytic/?filter=all",
+        "/analytic/?filter=student&student_id=STU001",
+        "/analytic/?filter=subject",
+        "/analytic/?filter=predict&student_id=STU001",
+        "/user/list",
+        "/user/list?role=student",
+        "/user/search?keyword=STU001",
+        "/user/search?keyword=山田",
+        "/subject/list",
+        "/subject/list?keyword=プログラミング",
+        "/subject/manage/{subject_id}",
+    ],
+    "teacher": [
+        "/grade/list",
+        "/analytic/?filter=all",
+        "/user/list",
+        "/subject/list",
+        "/subject/manage/{subject_id}",
+    ],
+    "student": [
+        "/grade/list",
+        "/analytic/?filter=all",
+        "/analytic/?filter=predict",
+        "/subject/list",
+        "/enrollments/",
+    ],
+}
+
+class QueryCounter:
+    """
+    リクエストの終了時に、utils.db が記録した SQL の件数と時間を受け取って合計するクラス。
+    """
+
+    def __init__(self, app):
+        self.reset()
+        request_finished.connect(self._finish, app)
+
+    def reset(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def _finish(self, sender, **extra):
+        stats = request_sql_stats()
+        if stats:
+            self.count += stats["count"]
+            self.seconds += stats["seconds"]
+
+
+def build_database(students: int, seed: int) -> float:
+    """
+    init_db の生成処理で学生数に応じたデータを作成する。
+
+    Returns:
+        float: 作成にかかった秒数
+    """
+    import init_db
+
+    start = time.perf_counter()
+    init_db.generate_random_data(
+        student_count=students,
+        teacher_count=max(5, students // 100),
+        subject_count=max(12, students // 250),
+        seed=seed,
+    )
+    db.close()
+    return time.perf_counter() - start
+
+
+def bench_endpoint(client, counter, url: str, samples: int) -> dict:
+    """
+    1つのエンドポイントを計測する。
+    時間の計測とは別に1回だけ tracemalloc を有効にして実行し、メモリのピークを求める。
+    """
+    status = client.get(url).status_code  # 初回の読み込み（キャッシュの作成など）は計測から除く
+
+    counter.reset()
+    client.get(url)
+    queries, sql_seconds = counter.count, counter.seconds
+
+    stats = measure(lambda: client.get(url), [()] * samples)
+
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "p50_ms": round(stats["p50_us"] / 1000, 2),
+        "p95_ms": round(stats["p95_us"] / 1000, 2),
+        "mean_ms": round(stats["mean_us"] / 1000, 2),
+        "queries": queries,
+        "sql_ms": round(sql_seconds * 1000, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_scale(app, counter, students: int, samples: int, seed: int) -> dict:
+    """
+    1つの規模のデータベースを作成し、全ロール・全エンドポイントを計測する。
+    """
+    from models import Subject
+
+    with temporary_database():
+        setup_seconds = build_database(students, seed)
+        subject_id = Subject.select(Subject.id).order_by(Subject.id).scalar()
+        db.close()
+
+        results = {}
+        for role, user_id, password in ACCOUNTS:
+            with app.test_client() as client:
+                client.post("/auth/login", data={"user_id": user_id, "password": password})
+                for template in ENDPOINTS[role]:
+                    url = template.format(subject_id=subject_id)
+                    results[f"{role} GET {url}"] = bench_endpoint(client, counter, url, samples)
+                    print(f"  {students:>7} {role:<8}{url}", file=sys.stderr)
+        flush_audit()  # ログイン記録を一時データベースに書き込んでから削除する
+        db.close_all()
+
+    return {"students": students, "setup_seconds": round(setup_seconds, 1), "endpoints": results}
+
+
+def git_revision() -> str | None:
+    """
+    計測したコミットのハッシュを返す（git が使えない場合は None）。
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="エンドポイントのベンチマーク")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="学生数の一覧（例: 1000 10000 100000）")
+    parser.add_argument("--samples", type=int, default=30, help="エンドポイントごとの計測回数（例: 30）")
+    parser.add_argument("--seed", type=int, default=0, help="データ生成の乱数シード")
+    parser.add_argument("--output", type=str, default=None, help="結果の JSON の出力先（省略時は標準出力）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from main import app
+    app.config["TESTING"] = True
+    counter = QueryCounter(app)
+
+    # データ生成やアプリの表示は結果の JSON と混ざらないよう標準エラーに出す
+    with contextlib.redirect_stdout(sys.stderr):
+        scales = [run_scale(app, counter, students, args.samples, args.seed) for students in args.scales]
+
+    result = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "samples": args.samples,
+        "seed": args.seed,
+        "scales": scales,
+    }
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
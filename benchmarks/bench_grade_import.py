@@ -0,0 +1,123 @@
+"""
+成績 CSV の一括取り込みを計測するベンチマーク。
+
+    python -m benchmarks.bench_grade_import --rows 1000000
+
+学生ごとに履修登録を作成し、同じ件数の成績 CSV を書き出して取り込む。
+2回目は同じ CSV を取り込み、既存の成績を更新する場合の時間を計測する。
+"""
+import argparse
+import csv
+import os
+import random
+import time
+import tracemalloc
+
+from models import Enrollment, Grade, GradeSummary, Subject
+from utils import create_version_triggers, db, import_grades
+from .common import temporary_database
+
+
+def populate(rows: int, subjects: int, seed: int) -> list[tuple[str, int]]:
+    """
+    科目と履修登録を投入する。
+
+    Returns:
+        list[tuple[str, int]]: 履修登録した (学籍番号, 科目ID) のリスト
+    """
+    for model in (Subject, Enrollment, Grade, GradeSummary):
+        model.create_table(safe=True)
+    # 本番と同じく、書き込みのたびに table_versions を進めるトリガーを作成する
+    create_version_triggers()
+
+    rnd = random.Random(seed)
+    per_student = 10
+    pairs = []
+    for i in range(rows // per_student):
+        student_id = f"STU{i:06d}"
+        pairs += [(student_id, subject_id) for subject_id in rnd.sample(range(1, subjects + 1), per_student)]
+
+    conn = db.connection()
+    with db.atomic():
+        conn.executemany(
+            "INSERT INTO subjects (name, department, category, grade, credits, day, period, day_order) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(f"科目{i}", "情報科学科", "required", 1, 2, "月", 1, 1) for i in range(1, subjects + 1)],
+        )
+        conn.executemany("INSERT INTO enrollments (student_id, subject_id) VALUES (?, ?)", pairs)
+    return pairs
+
+
+def write_csv(path: str, pairs: list[tuple[str, int]], seed: int) -> None:
+    """
+    履修登録に対応する成績 CSV を書き出す。
+    """
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["student_id", "subject_id", "score"])
+        writer.writerows((student_id, subject_id, rnd.randint(0, 100)) for student_id, subject_id in pairs)
+
+
+def timed_import(path: str, chunk_size: int, trace_memory: bool) -> dict:
+    """
+    CSV を取り込み、所要時間（と指定した場合はメモリのピーク）を返す。
+    tracemalloc は取り込みを数倍遅くするため、メモリの計測は指定した場合だけ行う。
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="") as f:
+        report = import_grades(f, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "imported": report["imported"],
+        "errors": report["error_count"],
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(report["imported"] / elapsed) if elapsed else 0,
+        "peak_mb": round(peak / 1024 / 1024, 1) if peak is not None else None,
+    }
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="成績 CSV 取り込みのベンチマーク")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="成績の行数（例: 1000000）")
+    parser.add_argument("--subjects", type=int, default=200, help="科目の数（例: 200）")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="1トランザクションの行数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc でメモリのピークも計測する")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with temporary_database() as path:
+        pairs = populate(args.rows, args.subjects, args.seed)
+        csv_path = os.path.join(os.path.dirname(path), "grades.csv")
+        write_csv(csv_path, pairs, args.seed)
+        print(f"履修登録 {len(pairs)} 件、成績 CSV {len(pairs)} 行を作成しました")
+
+        results = {
+            "insert": timed_import(csv_path, args.chunk_size, args.trace_memory),
+            "update": timed_import(csv_path, args.chunk_size, args.trace_memory),
+        }
+
+    print(f"{'取り込み':<10}{'行数':>10}{'秒':>8}{'行/秒':>12}{'メモリ(MB)':>12}")
+    for name, r in results.items():
+        peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+        print(f"{name:<10}{r['imported']:>10}{r['seconds']:>8.2f}{r['rows_per_sec']:>12}{peak:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+成績・履修登録のインデックス（マイグレーション v3）の効果を計測するベンチマーク。
+
+    python -m benchmarks.bench_indexes --rows 200000
+
+インデックスの無いテーブルに成績・履修登録を投入して検索時間を計測し、
+マイグレーションでインデックスを追加した後に同じ検索をもう一度計測する。
+"""
+import argparse
+import random
+
+from models import Enrollment, Grade, GradeSummary, Subject
+from models.migrations import _add_grade_enrollment_indexes
+from utils import db
+from .common import measure, temporary_database
+
+
+def populate(rows: int, subjects: int, seed: int) -> list[str]:
+    """
+    インデックスの無いテーブルを作成し、成績と履修登録を投入する。
+
+    Returns:
+        list[str]: 作成した学籍番号のリスト
+    """
+    for model in (Subject, Enrollment, Grade, GradeSummary):
+        # インデックスは作らずにテーブルだけ作成する
+        model._schema.create_table(safe=True)
+
+    rnd = random.Random(seed)
+    per_student = 10
+    student_ids = [f"STU{i:06d}" for i in range(rows // per_student)]
+
+    subject_rows = [(f"科目{i}", "情報科学科", "required", 1, 2, "月", 1, 1) for i in range(1, subjects + 1)]
+    grade_rows = []
+    enrollment_rows = []
+    for student_id in student_ids:
+        for subject_id in rnd.sample(range(1, subjects + 1), per_student):
+            grade_rows.append((student_id, subject_id, 2, rnd.randint(0, 100)))
+            enrollment_rows.append((subject_id, student_id))
+
+    conn = db.connection()
+    with db.atomic():
+        conn.executemany(
+            "INSERT INTO subjects (name, department, category, grade, credits, day, period, day_order) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            subject_rows,
+        )
+        conn.executemany("INSERT INTO grades (student_id, subject_id, unit, score) VALUES (?, ?, ?, ?)", grade_rows)
+        conn.executemany("INSERT INTO enrollments (subject_id, student_id) VALUES (?, ?)", enrollment_rows)
+    return student_ids
+
+
+def run_lookups(student_ids: list[str], subjects: int, samples: int, seed: int) -> dict:
+    """
+    ルートで使われている検索パターンを計測する。
+    """
+    rnd = random.Random(seed)
+    targets = [(rnd.choice(student_ids), rnd.randint(1, subjects)) for _ in range(samples)]
+
+    def grades_of_student(student_id, _):
+        list(Grade.select().where(Grade.student_id == student_id))
+
+    def grade_point_lookup(student_id, subject_id):
+        Grade.get_or_none((Grade.student_id == student_id) & (Grade.subject_id == subject_id))
+
+    def enrollment_exists(student_id, subject_id):
+        Enrollment.select().where(
+            (Enrollment.student_id == student_id) & (Enrollment.subject == subject_id)
+        ).exists()
+
+    def enrolled_subjects(student_id, _):
+        list(Enrollment.select(Enrollment, Subject).join(Subject).where(Enrollment.student_id == student_id))
+
+    return {
+        "grades_of_student": measure(grades_of_student, targets),
+        "grade_point_lookup": measure(grade_point_lookup, targets),
+        "enrollment_exists": measure(enrollment_exists, targets),
+        "enrolled_subjects": measure(enrolled_subjects, targets),
+    }
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="インデックスのベンチマーク")
+    parser.add_argument("--rows", type=int, default=200_000, help="成績の行数（例: 200000）")
+    parser.add_argument("--subjects", type=int, default=200, help="科目の数（例: 200）")
+    parser.add_argument("--samples", type=int, default=200, help="検索ごとの計測回数（例: 200）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with temporary_database():
+        student_ids = populate(args.rows, args.subjects, args.seed)
+        print(f"成績 {len(student_ids) * 10} 行、学生 {len(student_ids)} 名を投入しました")
+
+        before = run_lookups(student_ids, args.subjects, args.samples, args.seed)
+        with db.atomic():
+            _add_grade_enrollment_indexes()
+        after = run_lookups(student_ids, args.subjects, args.samples, args.seed)
+
+    print(f"{'検索':<22}{'追加前 p50(µs)':>16}{'追加後 p50(µs)':>16}{'倍率':>10}")
+    for name in before:
+        b, a = before[name]["p50_us"], after[name]["p50_us"]
+        print(f"{name:<22}{b:>16.1f}{a:>16.1f}{b / a if a else 0:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+ログインのスループットをハッシュのコスト設定ごとに計測するベンチマーク。
+
+    python -m benchmarks.bench_login --clients 16 --seconds 5
+
+複数のスレッドから Flask のテストクライアントでログインを繰り返し、
+ハッシュ方式（Config.PASSWORD_HASH_METHOD）ごとに 1秒・1コアあたりのログイン数、
+待ち行列が一杯で 503 を返した数、同時にログイン画面を表示した場合の p95 を比較する。
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import threading
+import time
+
+from utils import Config, db, flush_audit
+from .common import percentile, temporary_database
+
+DEFAULT_METHODS = [
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:600000",
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+]
+
+
+def run(app, method: str, clients: int, seconds: float, students: int) -> dict:
+    """
+    指定したハッシュ方式でデータベースを作成し、ログインを同時に繰り返す。
+
+    Returns:
+        dict: {logins, shed, logins_per_sec, logins_per_sec_per_core, page_p95_ms}
+    """
+    import init_db
+
+    Config.PASSWORD_HASH_METHOD = method
+    with temporary_database():
+        with contextlib.redirect_stdout(io.StringIO()):
+            init_db.generate_random_data(student_count=students, teacher_count=1, subject_count=1)
+        db.close()
+
+        stop = threading.Event()
+        counts = {"logins": 0, "shed": 0, "failed": 0}
+        page_samples = []
+        lock = threading.Lock()
+
+        def login_loop(seed):
+            rnd = random.Random(seed)
+            client = app.test_client()
+            while not stop.is_set():
+                user_id = f"STU{rnd.randrange(1, students + 1):03d}"
+                status = client.post(
+                    "/auth/login", data={"user_id": user_id, "password": init_db.DEFAULT_PASSWORD}
+                ).status_code
+                key = "logins" if status == 302 else "shed" if status == 503 else "failed"
+                with lock:
+                    counts[key] += 1
+            db.close()
+
+        def page_loop():
+            # ログインが集中している間に、ハッシュ計算を伴わない画面の応答時間を計測する
+            client = app.test_client()
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.get("/auth/login")
+                page_samples.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(clients)]
+        threads.append(threading.Thread(target=page_loop))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for t in threads:
+                t.start()
+            time.sleep(seconds)
+            stop.set()
+            for t in threads:
+                t.join()
+        flush_audit()  # ログイン記録を一時データベースに書き込んでから削除する
+        db.close_all()
+
+    cores = min(Config.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+    page_samples.sort()
+    return dict(
+        counts,
+        logins_per_sec=round(counts["logins"] / seconds, 1),
+        logins_per_sec_per_core=round(counts["logins"] / seconds / cores, 1),
+        page_p95_ms=round(percentile(page_samples, 95), 1) if page_samples else None,
+    )
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="ログインのベンチマーク")
+    parser.add_argument("--methods", type=str, nargs="+", default=DEFAULT_METHODS,
+                        help="比較するハッシュ方式（例: scrypt:32768:8:1）")
+    parser.add_argument("--clients", type=int, default=16, help="同時にログインするスレッド数（例: 16）")
+    parser.add_argument("--seconds", type=float, default=5.0, help="各方式の計測時間（秒）")
+    parser.add_argument("--students", type=int, default=100, help="ログインに使う学生の数（例: 100）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from main import app
+    app.config["TESTING"] = True
+
+    print(f"ハッシュ計算: {Config.PASSWORD_HASH_WORKERS} スレッド / 待ち行列 {Config.PASSWORD_HASH_QUEUE}"
+          f" / 同時ログイン {args.clients}")
+    print(f"{'方式':<24}{'ログイン/秒':>12}{'/秒/コア':>10}{'503':>8}{'失敗':>6}{'画面p95(ms)':>14}")
+    for method in args.methods:
+        result = run(app, method, args.clients, args.seconds, args.students)
+        print(f"{method:<24}{result['logins_per_sec']:>12}{result['logins_per_sec_per_core']:>10}"
+              f"{result['shed']:>8}{result['failed']:>6}{str(result['page_p95_ms']):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+部分一致検索（マイグレーション v5 の FTS5 索引）の効果を計測するベンチマーク。
+
+    python -m benchmarks.bench_search --users 100000
+
+学生・教員を投入し、ユーザー検索と同じ条件で LIKE '%keyword%' による検索と
+FTS5 (trigram) による検索の時間を比較する。
+"""
+import argparse
+import random
+
+from models import Student, Subject, Teacher, User
+from models.migrations import _add_search_indexes
+from utils import db, keyword_filter
+from .common import measure, temporary_database
+
+SURNAMES = ["佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤",
+            "吉田", "山田", "佐々木", "山口", "松本", "井上", "木村", "林", "斎藤", "清水"]
+GIVEN_NAMES = ["太郎", "花子", "一郎", "美咲", "翔太", "陽菜", "大輔", "結衣", "健太", "さくら",
+               "拓海", "葵", "蓮", "凛", "悠真", "芽依", "湊", "紬", "樹", "結菜"]
+
+
+def populate(users: int, seed: int) -> list[tuple[str, str]]:
+    """
+    学生と教員（1割）を投入する。
+
+    Returns:
+        list[tuple[str, str]]: 作成した (ID, 氏名) のリスト
+    """
+    for model in (User, Student, Teacher, Subject):
+        model.create_table(safe=True)
+
+    rnd = random.Random(seed)
+    people = []
+    for i in range(users):
+        prefix = "TCH" if i % 10 == 0 else "STU"
+        people.append((f"{prefix}{i:06d}", rnd.choice(SURNAMES) + rnd.choice(GIVEN_NAMES)))
+
+    conn = db.connection()
+    with db.atomic():
+        conn.executemany(
+            "INSERT INTO users (user_id, role) VALUES (?, ?)",
+            [(user_id, "teacher" if user_id.startswith("TCH") else "student") for user_id, _ in people],
+        )
+        conn.executemany(
+            "INSERT INTO students (student_id, name) VALUES (?, ?)",
+            [person for person in people if person[0].startswith("STU")],
+        )
+        conn.executemany(
+            "INSERT INTO teachers (teacher_id, name) VALUES (?, ?)",
+            [person for person in people if person[0].startswith("TCH")],
+        )
+    return people
+
+
+def search_keywords(people: list[tuple[str, str]], samples: int, seed: int) -> list[tuple[str]]:
+    """
+    氏名・IDの一部（3文字以上）を検索キーワードとして選ぶ。
+    """
+    rnd = random.Random(seed)
+    keywords = []
+    for _ in range(samples):
+        user_id, name = rnd.choice(people)
+        if rnd.random() < 0.5 and len(name) >= 3:
+            start = rnd.randint(0, len(name) - 3)
+            keywords.append((name[start:start + 3],))
+        else:
+            keywords.append((user_id[3:8],))
+    return keywords
+
+
+def run_searches(keywords: list[tuple[str]]) -> dict:
+    """
+    ユーザー検索（学生・教員）と同じクエリを計測する。
+    """
+    def search(keyword):
+        list(Student.select_with_user().where(keyword_filter(Student, keyword)))
+        list(Teacher.select_with_user().where(keyword_filter(Teacher, keyword)))
+
+    return {"user_search": measure(search, keywords)}
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="全文検索のベンチマーク")
+    parser.add_argument("--users", type=int, default=100_000, help="ユーザー数（例: 100000）")
+    parser.add_argument("--samples", type=int, default=200, help="計測回数（例: 200）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with temporary_database():
+        people = populate(args.users, args.seed)
+        print(f"ユーザー {len(people)} 名を投入しました")
+        keywords = search_keywords(people, args.samples, args.seed)
+
+        # 索引の作成前は keyword_filter が LIKE で検索する
+        before = run_searches(keywords)
+        with db.atomic():
+            _add_search_indexes()
+        after = run_searches(keywords)
+
+    print(f"{'検索':<16}{'LIKE p50(µs)':>16}{'FTS5 p50(µs)':>16}{'倍率':>10}")
+    for name in before:
+        b, a = before[name]["p50_us"], after[name]["p50_us"]
+        print(f"{name:<16}{b:>16.1f}{a:>16.1f}{b / a if a else 0:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
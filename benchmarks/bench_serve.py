@@ -0,0 +1,178 @@
+"""
+開発用サーバー（python main.py）と本番用サーバー（python main.py serve）のスループットを比較するベンチマーク。
+
+    python -m benchmarks.bench_serve --clients 16 --seconds 10
+
+一時ディレクトリに init_db でデータベースを作成し、そこで各サーバーを別プロセスとして起動する。
+複数のスレッドから管理者でログインして成績一覧・成績分析・ユーザー一覧を繰り返し取得し、
+1秒あたりのリクエスト数と p50/p95 を比較する。
+"""
+import argparse
+import http.client
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from utils import default_workers
+from .common import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+# 計測する URL
+URLS = [
+    "/grade/list",
+    "/analytic/?filter=all",
+    "/user/list",
+    "/subject/list",
+]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    """
+    サーバーが接続を受け付けるまで待つ
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"ポート {port} でサーバーが起動しませんでした")
+
+
+def login(port: int) -> tuple[http.client.HTTPConnection, str]:
+    """
+    管理者でログインし、接続とセッションの Cookie を返す
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    body = urllib.parse.urlencode({"user_id": "admin", "password": "admin"})
+    conn.request("POST", "/auth/login", body, {"Content-Type": "application/x-www-form-urlencoded"})
+    response = conn.getresponse()
+    response.read()
+    return conn, response.getheader("Set-Cookie").split(";", 1)[0]
+
+
+def load(port: int, clients: int, seconds: float) -> dict:
+    """
+    複数のスレッドから URL を繰り返し取得する
+
+    Returns:
+        dict: {requests, errors, requests_per_sec, p50_ms, p95_ms}
+    """
+    stop = threading.Event()
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(seed):
+        rnd = random.Random(seed)
+        conn, cookie = login(port)
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.request("GET", rnd.choice(URLS), headers={"Cookie": cookie})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+            if ok:
+                local.append((time.perf_counter() - start) * 1000)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    samples.sort()
+    return {
+        "requests": len(samples),
+        "errors": errors[0],
+        "requests_per_sec": round(len(samples) / seconds, 1),
+        "p50_ms": round(percentile(samples, 50), 1) if samples else None,
+        "p95_ms": round(percentile(samples, 95), 1) if samples else None,
+    }
+
+
+def run(command: list[str], workdir: str, port: int, clients: int, seconds: float) -> dict:
+    """
+    サーバーを起動して負荷をかけ、終了させる
+    """
+    env = dict(os.environ, DEBUG="0")
+    process = subprocess.Popen(command, cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        return load(port, clients, seconds)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def parse_args():
+    """
+    コマンドライン引数を解析する
+
+    Returns:
+        argparse.Namespace: 解析された引数
+    """
+    parser = argparse.ArgumentParser(description="サーバーのスループットのベンチマーク")
+    parser.add_argument("--clients", type=int, default=16, help="同時に接続するクライアント数（例: 16）")
+    parser.add_argument("--seconds", type=float, default=10.0, help="各サーバーの計測時間（秒）")
+    parser.add_argument("--students", type=int, default=2000, help="学生数（例: 2000）")
+    parser.add_argument("--workers", type=int, default=None, help="serve のワーカープロセス数（既定: CPU 数）")
+    parser.add_argument("--threads", type=int, default=4, help="serve のワーカーごとのスレッド数")
+    parser.add_argument("--port", type=int, default=18080, help="サーバーのポート番号")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workers = args.workers or default_workers()
+
+    workdir = tempfile.mkdtemp(prefix="stumanager-serve-")
+    try:
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "init_db.py"), "--s", str(args.students),
+             "--t", str(max(5, args.students // 100)), "--sb", str(max(12, args.students // 250))],
+            cwd=workdir, check=True, stdout=subprocess.DEVNULL,
+        )
+
+        servers = {
+            "開発用サーバー": [sys.executable, MAIN, "--host", "127.0.0.1", "--port", str(args.port)],
+            f"serve ({workers}x{args.threads})": [
+                sys.executable, MAIN, "--host", "127.0.0.1", "--port", str(args.port),
+                "serve", "--workers", str(workers), "--threads", str(args.threads),
+            ],
+        }
+        print(f"CPU {os.cpu_count()} / 同時接続 {args.clients} / 学生 {args.students}人")
+        print(f"{'サーバー':<20}{'リクエスト/秒':>14}{'p50(ms)':>10}{'p95(ms)':>10}{'エラー':>8}")
+        for name, command in servers.items():
+            result = run(command, workdir, args.port, args.clients, args.seconds)
+            print(f"{name:<20}{result['requests_per_sec']:>14}{str(result['p50_ms']):>10}"
+                  f"{str(result['p95_ms']):>10}{result['errors']:>8}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+ベンチマークで共通して使う補助関数
+"""
+import math
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from utils import db
+
+
+@contextmanager
+def temporary_database(name: str = "bench.db", pragmas=None):
+    """
+    一時ディレクトリのデータベースに接続先を切り替えるコンテキストマネージャ。
+    終了時に接続先と PRAGMA を元に戻し、一時ディレクトリを削除する。
+
+    Args:
+        name (str): データベースファイル名
+        pragmas (dict | None): 接続時に適用する PRAGMA（None の場合は現在の設定）
+
+    Yields:
+        str: 一時データベースのパス
+    """
+    original = db.database
+    original_pragmas = db._pragmas
+    workdir = tempfile.mkdtemp(prefix="stumanager-bench-")
+    path = os.path.join(workdir, name)
+
+    if not db.is_closed():
+        db.close()
+    db.close_all()
+    db.init(path, pragmas=pragmas)
+    try:
+        yield path
+    finally:
+        if not db.is_closed():
+            db.close()
+        db.close_all()
+        db.init(original, pragmas=original_pragmas)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def percentile(samples, pct: float) -> float | None:
+    """
+    最近傍順位法（nearest-rank）でパーセンタイルを返す。
+
+    Args:
+        samples: 昇順に並べた計測値
+        pct (float): パーセンタイル（例: 95）
+
+    Returns:
+        float | None: パーセンタイルの値（計測値が無い場合は None）
+    """
+    if not samples:
+        return None
+    return samples[max(math.ceil(pct / 100 * len(samples)), 1) - 1]
+
+
+def measure(fn, args_list) -> dict:
+    """
+    引数ごとに関数を1回ずつ実行し、所要時間の統計を返す。
+
+    Args:
+        fn: 計測する関数
+        args_list: fn に渡す引数タプルのリスト
+
+    Returns:
+        dict: {count, mean_us, p50_us, p95_us}（単位はマイクロ秒）
+    """
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+
+    samples.sort()
+    return {
+        "count": len(samples),
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(percentile(samples, 50), 1),
+        "p95_us": round(percentile(samples, 95), 1),
+    }
@@ -1,42 +1,220 @@
 """
 データベースの初期化とランダムデータ生成スクリプトです。
+
+乱数のシードを指定すると、同じデータを何度でも生成できます。
+データは大きなトランザクションでまとめて挿入するため、
+学生数十万人・成績数百万件の負荷試験用データも数分で生成できます。
 """
 
 import random
 import argparse
+import time
 from datetime import date, timedelta
-from utils.db import db
-from models import Password, Student, Teacher, Subject, Grade, User, Enrollment
+
+from peewee import chunked
+
+from models import Password, Student, Teacher, Subject, Grade, User, Enrollment, GradeSummary, initialize_database
+from models.subject import DAY_ORDER
+from utils import db, hash_password, hash_passwords, rebuild_grade_summary
 
 # --- ランダムのユーザー名と科目 ---
 LAST_NAMES = ["山田", "田中", "佐藤", "鈴木", "高橋", "伊藤", "渡辺", "中村", "小林", "加藤"]
 FIRST_NAMES_MALE = ["太郎", "一郎", "健太", "浩志", "直樹", "亮", "修", "拓也"]
 FIRST_NAMES_FEMALE = ["花子", "恵", "真由美", "陽子", "結衣", "香織", "美紀", "彩"]
 DEPARTMENTS = ["情報科学科", "電気電子工学科", "機械工学科", "経営学科"]
+# 学科ごとの在籍者数の比率（DEPARTMENTS と同じ順）
+DEPARTMENT_WEIGHTS = [4, 3, 2, 1]
 SUBJECT_PREFIX = ["基礎", "応用", "実践", "概論", "演習"]
 SUBJECT_CORE = ["プログラミング", "アルゴリズム", "データベース", "ネットワーク", "AI", "OS"]
+# 全学科の学生が履修できる科目の専攻
+COMMON_DEPARTMENT = "全専攻"
+DAYS = ["月", "火", "水", "木", "金"]
+
+# 全ユーザー共通の初期パスワード
+DEFAULT_PASSWORD = "password123"
+
+# 1回の executemany で挿入する行数
+BATCH_SIZE = 5000
+
 
-def get_random_date(start_year, end_year):
+def get_random_date(rnd, start_year, end_year):
     """
     指定された年の範囲内でランダムな日付を生成
     """
     start_date = date(start_year, 1, 1)
     end_date = date(end_year, 12, 31)
-    time_between_dates = end_date - start_date
-    days_between_dates = time_between_dates.days
-    random_number_of_days = random.randrange(days_between_dates)
-    return start_date + timedelta(days=random_number_of_days)
+    return start_date + timedelta(days=rnd.randrange((end_date - start_date).days))
+
+
+def random_name(rnd, gender):
+    """
+    性別に合わせたランダムな氏名を生成
+    """
+    first_names = FIRST_NAMES_MALE if gender == 'male' else FIRST_NAMES_FEMALE
+    return rnd.choice(LAST_NAMES) + rnd.choice(first_names)
+
+
+def user_password(user_id: str) -> str:
+    """
+    --distinct-passwords を指定した場合の各ユーザーのパスワード
+    """
+    return f"{user_id}-{DEFAULT_PASSWORD}"
+
+
+def bulk_insert(model, fields, rows) -> int:
+    """
+    行をまとめて挿入する
+    1行分の INSERT 文を BATCH_SIZE 行ずつ executemany で実行する。
+
+    Args:
+        model: 挿入先のモデル
+        fields: 列（フィールド）のリスト
+        rows: fields と同じ順のタプルのイテラブル
+
+    Returns:
+        int: 挿入した行数
+    """
+    # peewee の insert は列を定義順に並べ替えるため、fields の順で SQL を組み立てる
+    sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+        model._meta.table_name,
+        ', '.join(f'"{field.column_name}"' for field in fields),
+        ', '.join('?' * len(fields)),
+    )
+    count = 0
+    with db.atomic():
+        for batch in chunked(rows, BATCH_SIZE):
+            db.cursor().executemany(sql, batch)
+            count += len(batch)
+    return count
+
 
 def clear_db():
     """
     既存のデータを削除
     """
-    tables = [Enrollment, Grade, Password, Student, Teacher, Subject, User]
-    for table in tables:
-        table.delete().execute()
+    tables = [Enrollment, Grade, GradeSummary, Password, Student, Teacher, Subject, User]
+    with db.atomic():
+        for table in tables:
+            table.delete().execute()
     print("✓ 既存のデータを削除しました")
 
-def generate_random_data(student_count=20, teacher_count=5, subject_count=10):
+
+def generate_subjects(rnd, subject_count):
+    """
+    学科ごとの科目カタログを生成する
+    各学年に全学科共通の科目を1つ以上用意し、残りは学科・学年ごとに割り当てる。
+
+    Returns:
+        list[dict]: 科目の一覧（id を含む）
+    """
+    common_count = max(4, subject_count // 5)
+    subjects = []
+    for i in range(subject_count):
+        if i < common_count:
+            department = COMMON_DEPARTMENT
+            grade = i % 4 + 1
+        else:
+            department = DEPARTMENTS[(i - common_count) % len(DEPARTMENTS)]
+            grade = (i - common_count) // len(DEPARTMENTS) % 4 + 1
+        day = rnd.choice(DAYS)
+        subjects.append({
+            "id": i + 1,
+            "name": f"{rnd.choice(SUBJECT_CORE)}{rnd.choice(SUBJECT_PREFIX)}",
+            "department": department,
+            "category": "required" if department != COMMON_DEPARTMENT and rnd.random() < 0.4 else "elective",
+            "grade": grade,
+            "credits": rnd.choice([2, 2, 2, 4]),
+            "day": day,
+            "period": rnd.randint(1, 5),
+            "day_order": DAY_ORDER[day],
+            # 科目の難しさ（点数の平均からのずれ）
+            "difficulty": rnd.gauss(0, 7),
+        })
+    return subjects
+
+
+def generate_people(rnd, prefix, count, birth_years):
+    """
+    教員・学生の基本情報を生成する
+
+    Returns:
+        list[dict]: {id, name, birth_date, gender, department, grade}
+    """
+    genders = ['male', 'female'] if prefix == "TEA" else ['male', 'female', 'other']
+    people = []
+    for i in range(1, count + 1):
+        gender = rnd.choice(genders)
+        people.append({
+            "id": f"{prefix}{i:03d}",
+            "name": random_name(rnd, gender),
+            "birth_date": get_random_date(rnd, *birth_years).isoformat(),
+            "gender": gender,
+            "department": rnd.choices(DEPARTMENTS, weights=DEPARTMENT_WEIGHTS)[0],
+            "grade": str(rnd.randint(1, 4)),
+        })
+    return people
+
+
+def insert_users(people, role, distinct_passwords=False, workers=None):
+    """
+    User・教員/学生・パスワードをまとめて挿入する
+    共通パスワードの場合はハッシュを1回だけ計算して使い回す。
+    """
+    if distinct_passwords:
+        hashes = hash_passwords([user_password(p["id"]) for p in people], workers=workers)
+    else:
+        shared = hash_password(DEFAULT_PASSWORD)
+        hashes = [shared] * len(people)
+
+    bulk_insert(User, [User.user_id, User.role], ((p["id"], role) for p in people))
+    if role == 'teacher':
+        bulk_insert(
+            Teacher,
+            [Teacher.teacher_id, Teacher.name, Teacher.birth_date, Teacher.gender, Teacher.department],
+            ((p["id"], p["name"], p["birth_date"], p["gender"], p["department"]) for p in people),
+        )
+    else:
+        bulk_insert(
+            Student,
+            [Student.student_id, Student.name, Student.birth_date, Student.gender, Student.department, Student.grade],
+            ((p["id"], p["name"], p["birth_date"], p["gender"], p["department"], p["grade"]) for p in people),
+        )
+    bulk_insert(
+        Password,
+        [Password.user_id, Password.password_hash, Password.role],
+        ((p["id"], password_hash, role) for p, password_hash in zip(people, hashes)),
+    )
+
+
+def generate_enrollments(rnd, students, subjects, min_subjects, max_subjects):
+    """
+    受講条件（学年・専攻）を満たす科目から履修登録と成績を生成する
+    点数は学生の学力と科目の難しさに左右される、高得点寄りの分布にする。
+
+    Yields:
+        tuple: (学籍番号, 科目ID, 単位数, 点数)
+    """
+    eligible = {}
+    for student in students:
+        key = (student["grade"], student["department"])
+        if key not in eligible:
+            eligible[key] = [
+                s for s in subjects
+                if str(s["grade"]) == student["grade"]
+                and s["department"] in (COMMON_DEPARTMENT, student["department"])
+            ]
+
+        candidates = eligible[key]
+        count = min(len(candidates), rnd.randint(min_subjects, max_subjects))
+        # 学力は平均70点前後で、低い側に裾が長い分布にする
+        ability = 100 - rnd.gammavariate(3, 10)
+        for subject in rnd.sample(candidates, count):
+            score = round(ability - subject["difficulty"] + rnd.gauss(0, 9))
+            yield student["id"], subject["id"], subject["credits"], min(100, max(0, score))
+
+
+def generate_random_data(student_count=20, teacher_count=5, subject_count=10, seed=0,
+                         min_subjects=2, max_subjects=6, distinct_passwords=False, workers=None):
     """
     ランダムなデータを生成してデータベースに挿入する
     生成されるデータの数は引数で指定可能
@@ -44,78 +222,51 @@ def generate_random_data(student_count=20, teacher_count=5, subject_count=10):
         student_count (int): 生成する学生の数. 初期値は20.
         teacher_count (int): 生成する教師の数. 初期値は5.
         subject_count (int): 生成する科目の数. 初期値は10.
+        seed (int | None): 乱数のシード. None の場合は毎回異なるデータになる.
+        min_subjects (int): 学生1人あたりの最少履修科目数. 初期値は2.
+        max_subjects (int): 学生1人あたりの最多履修科目数. 初期値は6.
+        distinct_passwords (bool): True の場合はユーザーごとに異なるパスワードにする.
+        workers (int | None): パスワードのハッシュ化に使うプロセス数.
     """
-    db.create_tables([Password, Student, Teacher, Subject, Grade, User, Enrollment], safe=True)
+    start = time.perf_counter()
+    rnd = random.Random(seed)
+
+    initialize_database()
     clear_db()
 
     # 科目の生成
-    subjects = []
-    days = ["月", "火", "水", "木", "金"]
-    for i in range(subject_count):
-        sub = Subject.create(
-            name=f"{random.choice(SUBJECT_CORE)}{random.choice(SUBJECT_PREFIX)}",
-            department=random.choice(DEPARTMENTS),
-            category=random.choice(["required", "elective"]),
-            grade=random.randint(1, 4),
-            credits=random.choice([2, 4]),
-            day=random.choice(days),
-            period=random.randint(1, 5)
-        )
-        subjects.append(sub)
+    subjects = generate_subjects(rnd, subject_count)
+    bulk_insert(
+        Subject,
+        [Subject.id, Subject.name, Subject.department, Subject.category, Subject.grade,
+         Subject.credits, Subject.day, Subject.period, Subject.day_order],
+        ((s["id"], s["name"], s["department"], s["category"], s["grade"],
+          s["credits"], s["day"], s["period"], s["day_order"]) for s in subjects),
+    )
     print(f"✓ 科目データを {subject_count} 件作成しました")
 
     # 教員の生成 (User -> Teacher -> Password)
-    for i in range(1, teacher_count + 1):
-        t_id = f"TEA{i:03d}"
-        gender = random.choice(['male', 'female'])
-        name = random.choice(LAST_NAMES) + (random.choice(FIRST_NAMES_MALE) if gender == 'male' else random.choice(FIRST_NAMES_FEMALE))
-        
-        User.create(user_id=t_id, role='teacher')
-        Teacher.create(
-            teacher_id=t_id,
-            name=name,
-            birth_date=get_random_date(1960, 1990),
-            gender=gender,
-            department=random.choice(DEPARTMENTS)
-        )
-        Password.create_password(user_id=t_id, role='teacher', raw_password="password123")
+    teachers = generate_people(rnd, "TEA", teacher_count, (1960, 1990))
+    insert_users(teachers, 'teacher', distinct_passwords, workers)
     print(f"✓ 教員データを {teacher_count} 件作成しました")
 
     # 学生の生成 (User -> Student -> Password)
-    student_ids = []
-    for i in range(1, student_count + 1):
-        s_id = f"STU{i:03d}"
-        student_ids.append(s_id)
-        gender = random.choice(['male', 'female', 'other'])
-        name = random.choice(LAST_NAMES) + (random.choice(FIRST_NAMES_MALE) if gender == 'male' else random.choice(FIRST_NAMES_FEMALE))
-        
-        User.create(user_id=s_id, role='student')
-        Student.create(
-            student_id=s_id,
-            name=name,
-            birth_date=get_random_date(2003, 2006),
-            gender=gender,
-            department=random.choice(DEPARTMENTS),
-            grade=str(random.randint(1, 4))
-        )
-        Password.create_password(user_id=s_id, role='student', raw_password="password123")
+    students = generate_people(rnd, "STU", student_count, (2003, 2006))
+    insert_users(students, 'student', distinct_passwords, workers)
     print(f"✓ 学生データを {student_count} 件作成しました")
 
-    # 履修登録と成績の生成
-    for s_id in student_ids:
-        # ランダムに2〜4科目を履修登録
-        enrolled_subs = random.sample(subjects, random.randint(2, 4))
-        for sub in enrolled_subs:
-            Enrollment.create(subject=sub, student_id=s_id)
-            
-            # 成績データの生成
-            Grade.create(
-                student_id=s_id,
-                subject_id=sub.id,
-                unit=sub.credits,
-                score=random.randint(0, 100)
-            )
-    print("✓ 履修登録と成績データをランダムに作成しました")
+    # 履修登録と成績の生成（成績の行から履修登録も作る）
+    grade_count = 0
+    with db.atomic():
+        for batch in chunked(generate_enrollments(rnd, students, subjects, min_subjects, max_subjects), BATCH_SIZE):
+            bulk_insert(Enrollment, [Enrollment.subject, Enrollment.student_id],
+                        ((subject_id, student_id) for student_id, subject_id, _, _ in batch))
+            grade_count += bulk_insert(Grade, [Grade.student_id, Grade.subject_id, Grade.unit, Grade.score], batch)
+    print(f"✓ 履修登録と成績データを {grade_count} 件作成しました")
+
+    # 成績サマリーの再構築
+    rebuild_grade_summary()
+    print("✓ 成績サマリーを作成しました")
 
     # 管理者アカウントの作成
     if not User.get_or_none(User.user_id == 'admin'):
@@ -123,10 +274,12 @@ def generate_random_data(student_count=20, teacher_count=5, subject_count=10):
         Password.create_password(user_id='admin', role='admin', raw_password='admin')
         print("✓ 管理者を作成しました")
 
+    print(f"✓ {time.perf_counter() - start:.1f}秒で作成しました")
+
 def parse_args():
     """
     コマンドライン引数を解析する
-    
+
     Returns:
         argparse.Namespace: 解析された引数
     """
@@ -153,9 +306,52 @@ def parse_args():
         help="科目の数（例: 12）"
     )
 
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="乱数のシード（同じ値なら同じデータを生成する）"
+    )
+
+    parser.add_argument(
+        "--min-subjects",
+        type=int,
+        default=2,
+        help="学生1人あたりの最少履修科目数（例: 2）"
+    )
+
+    parser.add_argument(
+        "--max-subjects",
+        type=int,
+        default=6,
+        help="学生1人あたりの最多履修科目数（例: 6）"
+    )
+
+    parser.add_argument(
+        "--distinct-passwords",
+        action="store_true",
+        help=f"ユーザーごとに異なるパスワード（<ユーザーID>-{DEFAULT_PASSWORD}）にする"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="--distinct-passwords のハッシュ化に使うプロセス数（既定: CPU 数）"
+    )
+
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    generate_random_data(student_count=args.s, teacher_count=args.t, subject_count=args.sb)
-    print("\n✅ データベースの初期化とランダム生成が完了しました")
\ No newline at end of file
+    generate_random_data(
+        student_count=args.s,
+        teacher_count=args.t,
+        subject_count=args.sb,
+        seed=args.seed,
+        min_subjects=args.min_subjects,
+        max_subjects=args.max_subjects,
+        distinct_passwords=args.distinct_passwords,
+        workers=args.workers,
+    )
+    print("\n✅ データベースの初期化とランダム生成が完了しました")
@@ -1,12 +1,15 @@
 import argparse
+import os
+import time
 
 from datetime import datetime
-from flask import Flask, render_template
+from flask import Flask, render_template, jsonify
 from flask_login import login_required, current_user
 
 from models import initialize_database
 from routes import blueprints
-from utils import login_manager, Config, role_required, register_login_signals
+from utils import db, login_manager, Config, role_required, role_titles, cache_stats, user_cache_stats, register_login_signals, register_db_hooks, register_cache_hooks, rebuild_grade_summary, check_grade_summary, import_grades, provision_users, read_user_rows, default_workers, serve
+from utils.grade_import import IMPORT_CHUNK_SIZE
 
 # アプリケーションの設定
 app = Flask(__name__)
@@ -19,6 +22,12 @@ login_manager.login_view = 'auth.login'
 # ログイン信号の登録
 register_login_signals(app)
 
+# リクエストごとのデータベース接続の開閉を登録
+register_db_hooks(app)
+
+# 他のワーカープロセスの書き込みで古くなったキャッシュを、リクエストの開始時に捨てる
+register_cache_hooks(app)
+
 # ブループリントの登録
 for bp in blueprints:
     app.register_blueprint(bp)
@@ -32,10 +41,12 @@ def inject_user():
     Returns:
         dict: ユーザー情報の辞書(ユーザーがログインしていない場合は空の辞書)
     """
-    if current_user.profile_dict():
+    profile = current_user.profile_dict()
+    if profile:
         return dict(
-            user_name=current_user.profile_dict().get('name', 'ユーザー'),
+            user_name=profile.get('name', 'ユーザー'),
             user_role=current_user.role,
+            user_role_title=role_titles().get(current_user.role, current_user.role),
             current_date=datetime.now().strftime('%Y年%m月%d日'),
             active_template=f"dashboard/{current_user.role}.html"
         )
@@ -56,6 +67,24 @@ def dashboard():
     return render_template(template_name,
                          active_page='dashboard')
 
+@app.route('/dashboard/db_stats')
+@role_required('admin')
+@login_required
+def db_stats():
+    """
+    データベース接続プールの利用状況（監視用）
+    """
+    return jsonify(db.connection_stats())
+
+@app.route('/dashboard/cache_stats')
+@role_required('admin')
+@login_required
+def cache_stats_view():
+    """
+    プロセス内キャッシュのヒット・ミス数とテーブルのバージョン（監視用）
+    """
+    return jsonify(dict(cache_stats(), users=user_cache_stats()))
+
 def parse_args():
     """
     コマンドライン引数を解析する
@@ -86,12 +115,162 @@ def parse_args():
         help="デバッグモードを有効化"
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+
+    summary_parser = subparsers.add_parser(
+        "gpa-summary",
+        help="成績サマリーを成績データから再構築する"
+    )
+    summary_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="再構築せず、成績データとのずれだけを確認する"
+    )
+
+    import_parser = subparsers.add_parser(
+        "import-grades",
+        help="成績 CSV（student_id, subject_id, score）を一括で取り込む"
+    )
+    import_parser.add_argument("csv_path", help="取り込む CSV ファイルのパス")
+    import_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help="1つのトランザクションで取り込む行数（例: 10000）"
+    )
+
+    provision_parser = subparsers.add_parser(
+        "provision-users",
+        help="ユーザーを CSV / JSON / JSONL ファイルから一括で登録する"
+    )
+    provision_parser.add_argument("path", help="ユーザー一覧のファイル（拡張子で形式を判定）")
+    provision_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="パスワードのハッシュ化に使うプロセス数（既定: CPU 数）"
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="本番用のサーバー（gunicorn、マルチプロセス）でアプリケーションを起動する"
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="ワーカープロセス数（既定: 環境変数 WEB_CONCURRENCY、未設定なら CPU 数）"
+    )
+    serve_parser.add_argument(
+        "--threads",
+        type=int,
+        default=Config.SERVE_THREADS,
+        help="ワーカーごとのスレッド数（例: 4）"
+    )
+
     return parser.parse_args()
 
 
+def run_serve(host: str, port: int, workers: int | None, threads: int):
+    """
+    本番用のサーバーでアプリケーションを起動する（デバッグモードは常に無効）
+
+    Args:
+        host (str): 待ち受けるホスト
+        port (int): 待ち受けるポート番号
+        workers (int | None): ワーカープロセス数
+        threads (int): ワーカーごとのスレッド数
+    """
+    app.debug = False
+    workers = workers or default_workers()
+    print(f"✓ http://{host}:{port}/ で起動します（ワーカー {workers} プロセス x {threads} スレッド）")
+    serve(app, host, port, workers=workers, threads=threads)
+    return 0
+
+
+def run_provision_users(path: str, workers: int | None):
+    """
+    ユーザーを一括で登録し、進捗と処理速度を表示する
+
+    Args:
+        path (str): ユーザー一覧のファイルのパス
+        workers (int | None): ハッシュ化に使うプロセス数
+    """
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = read_user_rows(f, fmt if fmt in ("json", "jsonl") else "csv")
+
+    def progress(done, total):
+        print(f"\rパスワードをハッシュ化しています: {done}/{total}", end="", flush=True)
+
+    report = provision_users(rows, workers=workers, progress=progress)
+    print()
+
+    for error in report["errors"]:
+        print(f"{error['index'] + 1}件目: {error['message']} ({error['user_id']})")
+    print(
+        f"✓ {report['created']}/{report['total']} 名を登録しました"
+        f"（ハッシュ化 {report['hash_seconds']:.2f}秒、登録 {report['insert_seconds']:.2f}秒、"
+        f"{report['users_per_sec']:.1f} 名/秒）"
+    )
+    return 1 if report["errors"] else 0
+
+
+def run_import_grades(csv_path: str, chunk_size: int):
+    """
+    成績 CSV を取り込み、結果とエラーの行を表示する
+
+    Args:
+        csv_path (str): CSV ファイルのパス
+        chunk_size (int): 1つのトランザクションで取り込む行数
+    """
+    start = time.perf_counter()
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        report = import_grades(f, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+
+    for error in report["errors"]:
+        print(f"{error['line']}行目: {error['message']} ({error['student_id']}, {error['subject_id']})")
+    if report["error_count"] > len(report["errors"]):
+        print(f"... 他 {report['error_count'] - len(report['errors'])} 件のエラー")
+
+    print(f"✓ {report['imported']}/{report['total']} 行を取り込みました（{elapsed:.2f}秒）")
+    return 1 if report["error_count"] else 0
+
+
+def run_gpa_summary(check: bool):
+    """
+    成績サマリーのずれを確認し、必要なら再構築する
+
+    Args:
+        check (bool): True の場合は確認のみ行う
+    """
+    drifted = check_grade_summary()
+    if drifted:
+        print(f"成績サマリーのずれ: {len(drifted)}名 ({', '.join(drifted[:10])}{' ...' if len(drifted) > 10 else ''})")
+    else:
+        print("成績サマリーは成績データと一致しています。")
+
+    if check:
+        return 1 if drifted else 0
+
+    count = rebuild_grade_summary()
+    print(f"✓ 成績サマリーを再構築しました（{count}名）")
+    return 0
+
+
 if __name__ == '__main__':
     # データベースの初期化
     initialize_database()
     
     args = parse_args()
+    if args.command == "gpa-summary":
+        raise SystemExit(run_gpa_summary(args.check))
+    if args.command == "import-grades":
+        raise SystemExit(run_import_grades(args.csv_path, args.chunk_size))
+    if args.command == "provision-users":
+        raise SystemExit(run_provision_users(args.path, args.workers))
+    if args.command == "serve":
+        raise SystemExit(run_serve(args.host, args.port, args.workers, args.threads))
+
     app.run(host=args.host, port=args.port, debug=args.debug)
@@ -6,6 +6,8 @@ from .grade import Grade
 from .user import User
 from .enrollment import Enrollment
 from .motivation import Motivation  
+from .grade_summary import GradeSummary
+from .login_event import LoginEvent
 
 from utils import db
 
@@ -18,6 +20,8 @@ MODELS = [
     User,
     Enrollment,
     Motivation,
+    GradeSummary,
+    LoginEvent,
 ]
 
 __all__ = [
@@ -29,6 +33,8 @@ __all__ = [
     "User",
     "Enrollment",
     "Motivation",
+    "GradeSummary",
+    "LoginEvent",
 ]
 
 def create_admin_user():
@@ -44,15 +50,14 @@ def create_admin_user():
 def initialize_database():
     """
     データベースの初期化。
-    既にデータベースが存在する場合は、初期化をスキップします。
+    未適用のマイグレーションを順番に適用し、スキーマを最新の状態にします。
+    その後、全モデルの定義とスキーマを比較し、ずれがあれば報告して修復します。
     """
-    
-    from os import path
-    if path.exists("database.db"):
-        print("データベースが既に存在しているので、初期化をスキップします。")
-        return
+    from .migrations import migrate_database
+    from .schema import verify_schema
 
-    db.connect()
-    db.create_tables(MODELS, safe=True)
-    create_admin_user()
+    db.connect(reuse_if_open=True)
+    migrate_database()
+    for problem in verify_schema():
+        print(f"⚠ スキーマのずれ: {problem}")
     db.close()
@@ -1,6 +1,14 @@
-from peewee import Model, CharField, ForeignKeyField
+from peewee import Model, CharField, ForeignKeyField, chunked
 from utils import db
 from models import Subject
+from .student import Student
+
+# 履修登録できなかった理由 {理由コード: メッセージ}
+SKIP_REASONS = {
+    'not_found': '学生が存在しません',
+    'not_eligible': '学生が受講可能な学年・専攻ではありません',
+    'already_enrolled': '学生がすでに受講しています',
+}
 
 class Enrollment(Model):
     subject = ForeignKeyField(
@@ -13,4 +21,75 @@ class Enrollment(Model):
 
     class Meta:
         database = db
-        table_name = 'enrollments'
\ No newline at end of file
+        table_name = 'enrollments'
+        indexes = (
+            # 学籍番号での検索と (学籍番号, 科目ID) の重複防止を兼ねる
+            (('student_id', 'subject'), True),
+        )
+
+    @classmethod
+    def enroll_students(cls, subject: Subject, student_ids) -> dict:
+        """
+        複数の学生をまとめて科目に履修登録する。
+        学生の取得・受講条件の判定・既存の履修の確認をそれぞれ1回のクエリで行い、
+        登録は1つのトランザクション内の INSERT OR IGNORE で行う。
+
+        Args:
+            subject (Subject): 履修する科目
+            student_ids: 学籍番号のリスト
+
+        Returns:
+            dict: {
+                enrolled: 登録した学籍番号のリスト,
+                skipped: [{student_id, reason, message}] 登録しなかった学生と理由
+            }
+        """
+        # 重複を除き、送信された順番を保つ
+        student_ids = list(dict.fromkeys(sid for sid in student_ids if sid))
+        skipped = {}
+
+        with db.atomic():
+            students = {}
+            existing = set()
+            for batch in chunked(student_ids, 500):
+                students.update(
+                    (row['student_id'], row)
+                    for row in (Student
+                                .select(Student.student_id, Student.grade, Student.department)
+                                .where(Student.student_id.in_(batch))
+                                .dicts())
+                )
+                existing.update(
+                    row[0]
+                    for row in (cls
+                                .select(cls.student_id)
+                                .where((cls.subject == subject) & cls.student_id.in_(batch))
+                                .tuples())
+                )
+
+            enrolled = []
+            for sid in student_ids:
+                student = students.get(sid)
+                if student is None:
+                    skipped[sid] = 'not_found'
+                elif not subject.accepts(student['grade'], student['department']):
+                    skipped[sid] = 'not_eligible'
+                elif sid in existing:
+                    skipped[sid] = 'already_enrolled'
+                else:
+                    enrolled.append(sid)
+
+            # 同時に登録された行と重複しても失敗しないよう、一意インデックスの衝突は無視する
+            for batch in chunked(enrolled, 500):
+                (cls
+                 .insert_many([(subject.id, sid) for sid in batch], fields=[cls.subject, cls.student_id])
+                 .on_conflict_ignore()
+                 .execute())
+
+        return {
+            "enrolled": enrolled,
+            "skipped": [
+                {"student_id": sid, "reason": reason, "message": SKIP_REASONS[reason]}
+                for sid, reason in skipped.items()
+            ],
+        }
@@ -10,3 +10,7 @@ class Grade(Model):
     class Meta:
         database = db
         table_name = 'grades'
+        indexes = (
+            # 学籍番号での検索と (学籍番号, 科目ID) の重複防止を兼ねる
+            (('student_id', 'subject_id'), True),
+        )
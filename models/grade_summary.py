@@ -0,0 +1,20 @@
+from datetime import datetime
+from peewee import Model, CharField, IntegerField, FloatField, DateTimeField
+from utils import db
+
+class GradeSummary(Model):
+    """
+    学生ごとの成績集計（GPA・単位数）を保持するモデル。
+    成績が書き込まれるたびに同じトランザクション内で更新される。
+    """
+    student_id = CharField(primary_key=True)    # 学籍番号
+    total_units = IntegerField(default=0)       # 総単位数
+    weighted_points = FloatField(default=0.0)   # 評価点 x 単位数 の合計
+    gpa = FloatField(default=0.0)               # GPA
+    passed_units = IntegerField(default=0)      # 合格（60点以上）した単位数
+    failed_units = IntegerField(default=0)      # 不合格の単位数
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        database = db
+        table_name = 'grade_summaries'
@@ -0,0 +1,22 @@
+from datetime import datetime
+from peewee import Model, CharField, DateTimeField
+from utils import db
+
+class LoginEvent(Model):
+    """
+    ログイン・ログアウトの履歴を保持するモデル。
+    ユーザーを削除しても履歴は残すため、users への外部キーは付けない。
+    書き込みは utils.audit のキューからまとめて行われる。
+    """
+    user_id = CharField()                       # ユーザーID
+    event = CharField()                         # login / logout
+    ip = CharField(null=True)                   # 接続元IPアドレス（ログイン時のみ）
+    created_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        database = db
+        table_name = 'login_events'
+        indexes = (
+            # ユーザーごとの履歴を新しい順に取得する
+            (('user_id', 'created_at'), False),
+        )
@@ -0,0 +1,153 @@
+"""
+データベースのスキーマを段階的に更新するマイグレーション。
+
+適用済みのバージョンは SQLite の PRAGMA user_version に記録し、
+起動時に未適用のマイグレーションだけを順番に実行する。
+"""
+from peewee import Case
+
+from utils import db
+from utils.gpa import rebuild_grade_summary
+from utils.cache import create_version_triggers
+from utils.search import create_search_indexes
+from . import MODELS, Enrollment, Grade, GradeSummary, LoginEvent, Subject, User, create_admin_user
+from .subject import DAY_ORDER, DAY_ORDER_DEFAULT
+
+
+def _create_tables():
+    """
+    存在しないテーブルを作成する。
+    新規データベースの場合は管理者ユーザーも作成する。
+    """
+    is_new = not User.table_exists()
+    for model in MODELS:
+        if not model.table_exists():
+            model.create_table(safe=True)
+
+    if is_new:
+        create_admin_user()
+
+
+def _build_grade_summary():
+    """
+    成績サマリーを成績データから作り直す。
+    """
+    GradeSummary.create_table(safe=True)
+    rebuild_grade_summary()
+
+
+def _add_grade_enrollment_indexes():
+    """
+    成績・履修登録に (学籍番号, 科目ID) の一意インデックスを追加する。
+    重複している行は、成績は最新（idが最大）の行、履修登録は最初の行だけを残す。
+    """
+    removed_grades = db.execute_sql(
+        "DELETE FROM grades WHERE id NOT IN "
+        "(SELECT MAX(id) FROM grades GROUP BY student_id, subject_id)"
+    ).rowcount
+    db.execute_sql(
+        "DELETE FROM enrollments WHERE id NOT IN "
+        "(SELECT MIN(id) FROM enrollments GROUP BY student_id, subject_id)"
+    )
+    Grade._schema.create_indexes(safe=True)
+    Enrollment._schema.create_indexes(safe=True)
+
+    # 重複した成績を削除した場合はサマリーも作り直す
+    if removed_grades:
+        rebuild_grade_summary()
+
+
+def _add_subject_day_order():
+    """
+    科目に曜日の並び順の列を追加し、既存の科目の値を day から設定する。
+    """
+    table = Subject._meta.table_name
+    if 'day_order' not in [column.name for column in db.get_columns(table)]:
+        # テーブルを作り直すと履修登録が CASCADE で消えるため、ALTER TABLE で列だけ追加する
+        db.execute_sql(
+            f"ALTER TABLE {table} ADD COLUMN day_order INTEGER NOT NULL DEFAULT {DAY_ORDER_DEFAULT}"
+        )
+
+    (Subject
+     .update(day_order=Case(Subject.day, list(DAY_ORDER.items()), DAY_ORDER_DEFAULT))
+     .execute())
+    Subject._schema.create_indexes(safe=True)
+
+
+def _add_search_indexes():
+    """
+    学生・教員・科目の部分一致検索用に FTS5 の索引を作成する。
+    FTS5 が使えない環境では作成せず、検索は LIKE で行う。
+    """
+    if not create_search_indexes():
+        print("⚠ FTS5 (trigram) が使えないため、検索用の索引は作成しませんでした")
+
+
+def _create_login_events():
+    """
+    ログイン・ログアウトの履歴テーブルを作成する。
+    """
+    LoginEvent.create_table(safe=True)
+
+
+def _add_table_versions():
+    """
+    ワーカープロセス間でキャッシュを無効化するため、テーブルごとのバージョンとトリガーを作成する。
+    """
+    create_version_triggers()
+
+
+def _add_user_table_version():
+    """
+    ユーザーの削除・ロールの変更を他のワーカーのログインユーザーのキャッシュに伝えるため、
+    users テーブルのバージョンとトリガーを追加する。
+    """
+    create_version_triggers()
+
+
+# (バージョン, 説明, 処理) の一覧。追加するときは末尾にバージョンを増やして追加する。
+MIGRATIONS = [
+    (1, "テーブルの作成", _create_tables),
+    (2, "成績サマリーの作成", _build_grade_summary),
+    (3, "成績・履修登録のインデックス追加", _add_grade_enrollment_indexes),
+    (4, "科目の曜日並び順の追加", _add_subject_day_order),
+    (5, "検索用の全文検索索引の作成", _add_search_indexes),
+    (6, "ログイン履歴テーブルの作成", _create_login_events),
+    (7, "キャッシュ無効化用のテーブルバージョンの作成", _add_table_versions),
+    (8, "ユーザーのテーブルバージョンの追加", _add_user_table_version),
+]
+
+
+def schema_version() -> int:
+    """
+    適用済みのマイグレーションのバージョンを返す。
+
+    Returns:
+        int: PRAGMA user_version の値
+    """
+    return db.pragma('user_version')
+
+
+def migrate_database() -> list[int]:
+    """
+    未適用のマイグレーションを順番に適用する。
+    各マイグレーションは1つのトランザクション内で実行される。
+
+    Returns:
+        list[int]: 今回適用したバージョンのリスト
+    """
+    applied = []
+    current = schema_version()
+
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+
+        with db.atomic():
+            migration()
+            db.pragma('user_version', version)
+
+        applied.append(version)
+        print(f"✓ マイグレーション v{version} を適用しました: {description}")
+
+    return applied
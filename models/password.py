@@ -3,9 +3,8 @@ from peewee import (
     CharField,
     ForeignKeyField,
 )
-from werkzeug.security import generate_password_hash, check_password_hash
-
 from utils import db
+from utils.hashing import hash_password, needs_rehash, run_hashing, verify_password_hash
 from .user import User
 
 
@@ -43,7 +42,7 @@ class Password(Model):
         cls.get_or_create(
             user_id=user_id,
             defaults={
-                "password_hash": generate_password_hash(raw_password),
+                "password_hash": hash_password(raw_password),
                 "role": role
             }
         )
@@ -51,15 +50,39 @@ class Password(Model):
     def verify_password(self, raw_password: str) -> bool:
         """
         入力されたパスワードが正しいか検証する。
+        ハッシュの計算は専用のスレッドプールで行う。
 
         Args:
             raw_password (str): 入力された平文パスワード
 
         Returns:
             bool: 正しい場合 True
+
+        Raises:
+            HashingBusy: 検証の待ち行列が上限に達している場合
+        """
+        return verify_password_hash(self.password_hash, raw_password)
+
+    def needs_rehash(self) -> bool:
+        """
+        ハッシュが現在の設定（Config.PASSWORD_HASH_METHOD）と異なる方式・コストで作られているかを返す。
+        """
+        return needs_rehash(self.password_hash)
+
+    def rehash(self, raw_password: str):
+        """
+        検証済みの平文パスワードから、現在の設定でハッシュを作り直して保存する。
+        ハッシュの計算は専用のスレッドプールで行う。
+
+        Args:
+            raw_password (str): 検証済みの平文パスワード
+
+        Raises:
+            HashingBusy: 待ち行列が上限に達している場合
         """
-        return check_password_hash(self.password_hash, raw_password)
-    
+        self.password_hash = run_hashing(hash_password, raw_password)
+        self.save()
+
     def update_password(self, raw_password: str):
         """
         ユーザーのパスワードを更新する。
@@ -67,5 +90,5 @@ class Password(Model):
         Args:
             raw_password (str): 新しい平文パスワード
         """
-        self.password_hash = generate_password_hash(raw_password)
+        self.password_hash = hash_password(raw_password)
         self.save()
\ No newline at end of file
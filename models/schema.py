@@ -0,0 +1,100 @@
+"""
+起動時のスキーマ検証
+
+models.MODELS の定義とデータベースのテーブル・列・インデックスを比較し、ずれを報告して修復する。
+起動時に1回だけ実行することで、リクエストの処理中に DDL を実行する必要をなくす。
+
+修復するのは安全に行えるものだけ（テーブル・列・インデックスの追加）で、
+余分な列や一意性の違いは報告のみ行う。
+"""
+from utils import db
+from . import MODELS
+
+
+def _literal(value) -> str | None:
+    """
+    列の既定値を SQL のリテラルに変換する（変換できない場合は None）
+    """
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return None
+
+
+def _add_column(model, field) -> bool:
+    """
+    ALTER TABLE で列を追加する。
+    NOT NULL の列は既定値が定数の場合だけ追加できる（SQLite では既存の行に値が必要なため）。
+
+    Returns:
+        bool: 追加した場合 True
+    """
+    ctx = db.get_sql_context()
+    sql, _ = ctx.sql(field.ddl(ctx)).query()
+    if not field.null:
+        default = _literal(field.default)
+        if default is None:
+            return False
+        sql += f" DEFAULT {default}"
+    db.execute_sql(f'ALTER TABLE "{model._meta.table_name}" ADD COLUMN {sql}')
+    return True
+
+
+def _verify_model(model, tables: set, repair: bool) -> list[str]:
+    """
+    1つのモデルのテーブル・列・インデックスを検証する
+    """
+    table = model._meta.table_name
+    if table not in tables:
+        if repair:
+            model.create_table(safe=True)
+        return [f"{table}: テーブルがありません" + ("（作成しました）" if repair else "")]
+
+    problems = []
+    columns = {column.name for column in db.get_columns(table)}
+    for field in model._meta.sorted_fields:
+        if field.column_name in columns:
+            continue
+        message = f"{table}.{field.column_name}: 列がありません"
+        if repair:
+            message += "（追加しました）" if _add_column(model, field) else "（既定値が無いため追加できません）"
+        problems.append(message)
+
+    expected = {field.column_name for field in model._meta.sorted_fields}
+    for name in sorted(columns - expected):
+        problems.append(f"{table}.{name}: モデルに無い列があります")
+
+    indexes = {index.name: index for index in db.get_indexes(table)}
+    missing = False
+    for index in model._meta.fields_to_index():
+        existing = indexes.get(index._name)
+        if existing is None:
+            missing = True
+            problems.append(f"{table}: インデックス {index._name} がありません" + ("（作成しました）" if repair else ""))
+        elif existing.unique != index._unique:
+            problems.append(f"{table}: インデックス {index._name} の一意性が定義と異なります")
+    if missing and repair:
+        model._schema.create_indexes(safe=True)
+
+    return problems
+
+
+def verify_schema(repair: bool = True) -> list[str]:
+    """
+    全モデルのスキーマを検証し、必要であれば修復する。
+
+    Args:
+        repair (bool): True の場合、足りないテーブル・列・インデックスを追加する
+
+    Returns:
+        list[str]: 見つかったずれの説明（一致している場合は空）
+    """
+    problems = []
+    with db.atomic():
+        tables = set(db.get_tables())
+        for model in MODELS:
+            problems.extend(_verify_model(model, tables, repair))
+    return problems
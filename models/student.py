@@ -24,26 +24,52 @@ class Student(Model):
         database = db
         table_name = 'students'
         
-    def to_dict(self) -> dict:
+    @classmethod
+    def select_with_user(cls):
         """
-        学生情報を辞書形式に変換する。
+        User と結合した学生のクエリを返す。
+        to_dict で User を参照しても追加のクエリが発生しない。
+
+        Returns:
+            SelectQuery: Student JOIN User のクエリ
+        """
+        return cls.select(cls, User).join(User)
+
+    @staticmethod
+    def row_to_dict(row: dict) -> dict:
+        """
+        .dicts() で取得した行を to_dict と同じ形式に変換する。
+
+        Args:
+            row (dict): students テーブルの行（role を含む場合はそれを使う）
 
         Returns:
             dict: 学生情報
         """
-        user = self.student_id
-        if self.gender == 'male':
+        if row.get("gender") == 'male':
             gender = '男性'
-        elif self.gender == 'female':
+        elif row.get("gender") == 'female':
             gender = '女性'
         else:
             gender = 'その他'
+        birth_date = row.get("birth_date")
         return {
-            "student_id": user.user_id,
-            "role": user.role,
-            "name": self.name,
-            "birth_date": self.birth_date.isoformat() if self.birth_date else None,
+            "student_id": row["student_id"],
+            "role": row.get("role") or 'student',
+            "name": row["name"],
+            "birth_date": birth_date.isoformat() if birth_date else None,
             "gender": gender,
-            "department": self.department,
-            "grade": self.grade,
-        }
\ No newline at end of file
+            "department": row.get("department"),
+            "grade": row.get("grade"),
+        }
+
+    def to_dict(self) -> dict:
+        """
+        学生情報を辞書形式に変換する。
+        User と結合していない場合でも User の読み込みは行わない。
+
+        Returns:
+            dict: 学生情報
+        """
+        user = self.__rel__.get('student_id')
+        return self.row_to_dict(dict(self.__data__, role=user.role if user else None))
@@ -1,6 +1,10 @@
 from peewee import Model, AutoField, CharField, IntegerField
 from utils import db
 
+# 曜日の並び順（曜日以外の値は最後に並べる）
+DAY_ORDER = {'月': 1, '火': 2, '水': 3, '木': 4, '金': 5, '土': 6, '日': 7}
+DAY_ORDER_DEFAULT = 9
+
 class Subject(Model):
     id = AutoField()                     # INTEGER PRIMARY KEY AUTOINCREMENT
     name = CharField()                   # 科目名
@@ -10,7 +14,40 @@ class Subject(Model):
     credits = IntegerField()             # 単位数
     day = CharField()                    # 曜日（月・火など）
     period = IntegerField()              # 時間（1〜6）
+    day_order = IntegerField(default=DAY_ORDER_DEFAULT)  # 曜日の並び順（保存時に day から設定）
 
     class Meta:
         database = db
         table_name = 'subjects'
+        indexes = (
+            # 曜日・時限順の一覧表示用
+            (('day_order', 'period', 'id'), False),
+        )
+
+    def target_grades(self) -> list[str]:
+        """
+        対象学年のリストを返す（複数学年の場合は "1,2" のように保存されている）。
+        """
+        return str(self.grade).split(',')
+
+    def accepts(self, grade, department) -> bool:
+        """
+        学生の学年・専攻がこの科目の受講条件を満たすかどうかを返す。
+
+        Args:
+            grade: 学生の学年
+            department: 学生の専攻
+
+        Returns:
+            bool: 受講できる場合は True
+        """
+        grade_match = str(grade) in self.target_grades()
+        department_match = (self.department == '全専攻' or department == self.department)
+        return grade_match and department_match
+
+    def save(self, *args, **kwargs):
+        """
+        曜日の並び順を day から設定してから保存する。
+        """
+        self.day_order = DAY_ORDER.get(self.day, DAY_ORDER_DEFAULT)
+        return super().save(*args, **kwargs)
@@ -18,25 +18,52 @@ class Teacher(Model):
     class Meta:
         database = db
         table_name = 'teachers'
+
+    @classmethod
+    def select_with_user(cls):
+        """
+        User と結合した教員のクエリを返す。
+        to_dict で User を参照しても追加のクエリが発生しない。
+
+        Returns:
+            SelectQuery: Teacher JOIN User のクエリ
+        """
+        return cls.select(cls, User).join(User)
+
+    @staticmethod
+    def row_to_dict(row: dict) -> dict:
+        """
+        .dicts() で取得した行を to_dict と同じ形式に変換する。
+
+        Args:
+            row (dict): teachers テーブルの行（role を含む場合はそれを使う）
+
+        Returns:
+            dict: 教員情報
+        """
+        if row.get("gender") == 'male':
+            gender = '男性'
+        elif row.get("gender") == 'female':
+            gender = '女性'
+        else:
+            gender = 'その他'
+        birth_date = row.get("birth_date")
+        return {
+            "teacher_id": row["teacher_id"],
+            "role": row.get("role") or 'teacher',
+            "name": row["name"],
+            "birth_date": birth_date.strftime("%Y-%m-%d") if birth_date else None,
+            "department": row.get("department"),
+            "gender": gender,
+        }
+
     def to_dict(self) -> dict:
-            """
-            教員情報を辞書形式に変換する。
-
-            Returns:
-                dict: 教員情報
-            """
-            user = self.teacher_id
-            if self.gender == 'male':
-                gender = '男性'
-            elif self.gender == 'female':
-                gender = '女性'
-            else:
-                gender = 'その他'
-            return {
-                "teacher_id": user.user_id,
-                "role": user.role,
-                "name": self.name,
-                "birth_date": self.birth_date.strftime("%Y-%m-%d") if self.birth_date else None,
-                "department": self.department,
-                "gender": gender,
-            }
\ No newline at end of file
+        """
+        教員情報を辞書形式に変換する。
+        User と結合していない場合でも User の読み込みは行わない。
+
+        Returns:
+            dict: 教員情報
+        """
+        user = self.__rel__.get('teacher_id')
+        return self.row_to_dict(dict(self.__data__, role=user.role if user else None))
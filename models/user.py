@@ -39,12 +39,20 @@ class User(UserMixin, Model):
     def profile_dict(self) -> dict | None:
         """
         role に応じたプロフィール情報を dict で返す
+        一度作成した結果はインスタンスに保持する（current_user はリクエストごとに作られるため、リクエスト内で共有される）。
         """
+        cached = self.__dict__.get('_profile_dict')
+        if cached is not None:
+            return cached
+
         if self.role == 'admin':
-            return {
+            cached = {
                 "user_id": self.user_id,
                 "name": self.user_id,
                 "role": self.role,
             }
-        profile = self.profile
-        return profile.to_dict() if profile else {}
\ No newline at end of file
+        else:
+            profile = self.profile
+            cached = profile.to_dict() if profile else {}
+        self._profile_dict = cached
+        return cached
\ No newline at end of file
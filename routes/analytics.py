@@ -1,26 +1,13 @@
 from flask import Blueprint, request, render_template
 from flask_login import login_required, current_user
-from peewee import OperationalError, fn
 
-from models import Grade, Subject, Student
-from utils import calculate_gpa, score_to_eval
+from models import Grade, Student
+from utils import calculate_gpa, get_cohort_stats, get_grade_columns, score_to_eval, subject_name_map
 
 
 analytics_bp = Blueprint("analytic", __name__, url_prefix="/analytic")
 
 
-def _load_subject_name_map() -> dict[int, str]:
-    """
-    subject テーブルが存在する場合だけ {subject_id: subject_name} を返す。
-    無い/壊れている場合は空dictを返す（= 科目名は '科目{ID}' にfallback）。
-    """
-    try:
-        rows = Subject.select(Subject.id, Subject.name)
-        return {int(r.id): str(r.name) for r in rows}
-    except (OperationalError, Exception):
-        return {}
-
-
 def _get_chart_all() -> dict:
     """
     全体の成績データを集計して返す。
@@ -31,52 +18,16 @@ def _get_chart_all() -> dict:
             message: 分析メッセージ
         }。
     """
-    students = Student.select()
-    if not students:
+    if not Student.select().exists():
         return {"labels": [], "data": [], "message": "学生データがありません。"}
 
-    gpa_buckets = {
-        "0.0~0.5": 0,
-        "0.5~1.0": 0,
-        "1.0~1.5": 0,
-        "1.5~2.0": 0,
-        "2.0~2.5": 0,
-        "2.5~3.0": 0,
-        "3.0~3.5": 0,
-        "3.5~4.0": 0
-    }
+    # 全体統計は成績が書き込まれるまでキャッシュされる
+    stats = get_cohort_stats()
+
+    labels = list(stats["histogram"].keys())
+    scores = list(stats["histogram"].values())
 
-    total_gpa = 0.0
-    valid_student_count = 0
-
-    for student in students:
-        gpa = calculate_gpa(student.student_id.user_id)
-        if gpa > 0:
-            total_gpa += gpa
-            valid_student_count += 1
-
-            if gpa < 0.5:
-                gpa_buckets["0.0~0.5"] += 1
-            elif gpa < 1.0:
-                gpa_buckets["0.5~1.0"] += 1
-            elif gpa < 1.5:
-                gpa_buckets["1.0~1.5"] += 1
-            elif gpa < 2.0:
-                gpa_buckets["1.5~2.0"] += 1
-            elif gpa < 2.5:
-                gpa_buckets["2.0~2.5"] += 1
-            elif gpa < 3.0:
-                gpa_buckets["2.5~3.0"] += 1
-            elif gpa < 3.5:
-                gpa_buckets["3.0~3.5"] += 1
-            else:
-                gpa_buckets["3.5~4.0"] += 1
-
-    labels = list(gpa_buckets.keys())
-    scores = list(gpa_buckets.values())
-
-    avg_gpa = round(total_gpa / valid_student_count, 2) if valid_student_count > 0 else 0.0
-    message = f"全体の平均GPA: {avg_gpa} | 集計対象学生: {valid_student_count}名"
+    message = f"全体の平均GPA: {stats['average']} | 集計対象学生: {stats['count']}名"
 
     return {"labels": labels, "data": scores, "message": message}
 
@@ -101,7 +52,7 @@ def _get_chart_by_student() -> dict:
         if not grades:
             return {"labels": [], "data": [], "message": "成績データがありません。"}
 
-        subject_map = _load_subject_name_map()
+        subject_map = subject_name_map()
         labels = []
         scores = []
         for g in grades:
@@ -115,7 +66,7 @@ def _get_chart_by_student() -> dict:
     if not grades:
         return {"labels": [], "data": [], "message": "成績データがありません。"}
 
-    subject_map = _load_subject_name_map()
+    subject_map = subject_name_map()
 
     labels = []
     scores = []
@@ -137,13 +88,12 @@ def _get_chart_by_subject() -> dict:
             "message": メッセージ
         }。
     """
-    subject_map = _load_subject_name_map()
+    subject_map = subject_name_map()
 
-    query = (Grade
-             .select(Grade.subject_id, fn.AVG(Grade.score).alias('avg_score'))
-             .group_by(Grade.subject_id))
+    # 科目ごとの統計は成績データの列から一括で計算する
+    subject_stats = get_grade_columns().subject_stats()
 
-    avg_map = {subject_map.get(q.subject_id, f"科目{q.subject_id}"): round(float(q.avg_score), 1) for q in query}
+    avg_map = {subject_map.get(subject_id, f"科目{subject_id}"): round(stats["mean"], 1) for subject_id, stats in subject_stats.items()}
 
     message = "成績データがありません。"
     if avg_map:
@@ -176,18 +126,8 @@ def _get_chart_by_predict() -> dict:
     except Exception:
         current_gpa = 0.0
 
-    # 全体平均GPA
-    total_gpa = 0.0
-    valid_student_count = 0
-    for stu in Student.select():
-        try:
-            gpa = float(calculate_gpa(stu.student_id.user_id) or 0.0)
-        except Exception:
-            gpa = 0.0
-        if gpa > 0:
-            total_gpa += gpa
-            valid_student_count += 1
-    avg_gpa = round(total_gpa / valid_student_count, 2) if valid_student_count > 0 else 0.0
+    # 全体平均GPA（キャッシュ済みの全体統計から取得）
+    avg_gpa = get_cohort_stats()["average"]
 
     # やる気値（motivationsテーブルから。無ければ50）
     motivation = 50
@@ -235,7 +175,7 @@ def analytic():
     req_filter = request.args.get("filter", "all") if current_user.role != 'student' else request.args.get("filter", "student")
     student_id = request.args.get("student_id")
 
-    students = [s.to_dict() for s in Student.select()]
+    students = [Student.row_to_dict(row) for row in Student.select().dicts()]
 
     if req_filter == "all":
         data = _get_chart_all()
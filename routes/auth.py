@@ -1,17 +1,15 @@
-from flask import Blueprint, render_template, request, url_for, redirect, flash
+from flask import Blueprint, render_template, request, url_for, redirect, flash, make_response
 from flask_login import login_required,login_user,logout_user, current_user
 
 from models import Password, User
-from utils import login_manager
+from utils import login_manager, load_cached_user, HashingBusy
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 @login_manager.user_loader
 def load_user(user_id):
-    try:
-        return User.get(User.user_id == user_id)
-    except User.DoesNotExist:
-        return None
+    # プロセス内のキャッシュから取得する（無い場合のみデータベースを参照）
+    return load_cached_user(user_id)
 # ログイン処理
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -24,10 +22,25 @@ def login():
     remember = 'remember' in request.form
 
     password = Password.get_or_none(Password.user_id == user_id)
-    if not password or not password.verify_password(raw_password):
+    try:
+        verified = password is not None and password.verify_password(raw_password)
+    except HashingBusy:
+        # 検証の待ち行列が一杯の場合は待たずに 503 を返す
+        flash("*ログインが混み合っています。しばらくしてから再度お試しください")
+        response = make_response(render_template("login.html", title="学生管理システム"), 503)
+        response.headers['Retry-After'] = '1'
+        return response
+    if not verified:
         flash("*ID またはパスワードが違います")
         return redirect(url_for("auth.login_page"))
 
+    # ハッシュの方式・コストの設定が変わっていれば、検証済みのパスワードで作り直す
+    if password.needs_rehash():
+        try:
+            password.rehash(raw_password)
+        except HashingBusy:
+            pass  # 混み合っている場合は次回のログイン時に作り直す
+
     user = User.get_or_none(User.user_id == user_id)
     if not user:
         flash("*ユーザー情報が存在しません")
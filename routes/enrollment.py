@@ -1,8 +1,8 @@
-from flask import Blueprint, request, render_template, redirect, url_for, current_app
+from flask import Blueprint, request, render_template, redirect, url_for, current_app, flash, jsonify
 from flask_login import login_required, current_user
 
 from models import Subject, Enrollment, Student
-from utils import role_required
+from utils import role_required, paginate, rows_response
 
 enrollment_bp = Blueprint('enrollments', __name__, url_prefix='/enrollments')
 
@@ -21,90 +21,78 @@ def index():
              .join(Enrollment, on=(Enrollment.subject_id == Subject.id))
              .where(Enrollment.student_id == student_id))
     
-    subjects = list(query)
-    
-    # 曜日と時限でソート
-    day_order = {'月': 1, '火': 2, '水': 3, '木': 4, '金': 5, '土': 6, '日': 7}
-    def sort_key(sub):
-        d = day_order.get(sub.day, 9)
-        try:
-            p = int(sub.period)
-        except (ValueError, TypeError):
-            p = 9
-        return (d, p)
-
-    sorted_subjects = sorted(subjects, key=sort_key)
-    
     # --- ページネーション処理---
-    offset = int(request.args.get('offset', 0))
-    limit = 50
-    
-    paged_subjects = sorted_subjects[offset : offset + limit]
-    has_more = (offset + limit) < len(sorted_subjects)
+    # 曜日・時限の順に SQL で並べ、前のページの最後の科目より後ろから取得する
+    paged_subjects, next_cursor = paginate(
+        query,
+        [Subject.day_order, Subject.period, Subject.id],
+        request.args.get('cursor'),
+    )
+    has_more = next_cursor is not None
 
     # AJAXリクエスト（スクロール時）の場合
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render_template(
+        return rows_response(render_template(
             'enrollment/enrollment_rows.html',
             subjects=paged_subjects
-        )
+        ), next_cursor)
 
     return render_template(
         'enrollment/enrollment_list.html', 
-        subjects=sorted_subjects, 
+        subjects=paged_subjects, 
         role=role,
         active_page='enrollments', 
-        has_more=has_more
+        has_more=has_more,
+        next_cursor=next_cursor,
     )
 
 @enrollment_bp.route('/create', methods=['POST'])
 @role_required('admin', 'teacher')
 @login_required
 def create():
-
+    """
+    選択した学生をまとめて履修登録する。
+    フォームから送信された場合は結果を flash して履修者管理に戻り、
+    JSON で送信された場合は登録した学生と登録しなかった理由を JSON で返す。
+    """
     role = current_user.role
     if role == 'student':
         return redirect(url_for('subject.subject_list', role='student'))
 
-    student_id_list = request.form.getlist('student_ids')
-    subject_id = request.form.get('subject_id')
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'JSON オブジェクトを送信してください'}), 400
+        student_id_list = data.get('student_ids') or []
+        if not isinstance(student_id_list, list) or not all(isinstance(s, str) for s in student_id_list):
+            return jsonify({'error': 'student_ids は学籍番号（文字列）の配列で指定してください'}), 400
+        subject_id = data.get('subject_id')
+    else:
+        student_id_list = request.form.getlist('student_ids')
+        subject_id = request.form.get('subject_id')
 
     subject = Subject.get_or_none(Subject.id == subject_id)
     if not subject:
+        if request.is_json:
+            return jsonify({'error': '科目が見つかりません'}), 404
         return redirect(url_for('subject.manage', role=role, subject_id=subject_id))
 
     try:
-        target_grades = str(subject.grade).split(',')
-
-        for sid in student_id_list:
-            student = Student.get_or_none(Student.student_id == sid)
-            if not student:
-                print(f"学生が存在しません: {sid}")
-                continue
-
-            grade_match = str(student.grade) in target_grades
-            department_match = (subject.department == '全専攻' or student.department == subject.department)
-
-            if not (grade_match and department_match):
-                print(f"学生が受講可能な年級ではありません: {sid}")
-                continue
-
-            exists = Enrollment.get_or_none(
-                (Enrollment.student_id == student) &
-                (Enrollment.subject_id == subject)
-            )
-
-            if exists:
-                print(f"学生がすでに受講しています: {sid}")
-                continue
-
-            Enrollment.create(
-                student_id=student,
-                subject_id=subject
-            )
-
+        result = Enrollment.enroll_students(subject, student_id_list)
     except Exception as e:
         current_app.logger.exception(e)
+        if request.is_json:
+            return jsonify({'error': str(e)}), 500
+        flash('履修登録に失敗しました。', 'error')
+        return redirect(url_for('subject.manage', role=role, subject_id=subject_id))
+
+    if request.is_json:
+        return jsonify(result)
+
+    if result['enrolled']:
+        flash(f"{len(result['enrolled'])} 名を履修登録しました。", 'success')
+    for skip in result['skipped']:
+        flash(f"{skip['message']}: {skip['student_id']}", 'error')
 
     return redirect(url_for(
         'subject.manage',
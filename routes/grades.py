@@ -1,37 +1,41 @@
+import io
 from datetime import datetime
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from peewee import DoesNotExist, OperationalError
+from peewee import JOIN, DoesNotExist
 from flask_login import login_required, current_user
 from peewee import DoesNotExist
 
-from utils import role_required
+from utils import db, role_required, refresh_grade_summary, bump_grade_version, paginate, rows_response, keyword_filter, import_grades, export_response, subject_name_map
 from models import Grade, Subject, Student, User, Enrollment, Motivation
+from utils.gpa import PASSING_SCORE
 
 grade_bp = Blueprint('grade', __name__, url_prefix='/grade')
 
 # -----------------------------
-# 成績一覧（/grade/list）
+# 成績の絞り込み（一覧・エクスポート共通）
 # -----------------------------
 
-@grade_bp.route('/list')
-@login_required
-def grade_list():
+def _filter_grades(query, args):
     """
-    - student: 自分の成績だけ表示（student_number の検索は無視）
+    成績一覧の検索条件をクエリに適用する。
+    - student: 自分の成績だけ（student_number の検索は無視）
     - teacher/admin: 学籍番号・科目で検索できる
-    """
 
-    is_student_view = (current_user.role == 'student')
-    current_filter = request.args.get('filter', 'all')
-    subject = (request.args.get('subject') or '').strip()
+    Args:
+        query: Grade のクエリ
+        args: リクエストのパラメータ（student_number, subject, filter）
 
-    query = Grade.select()
+    Returns:
+        SelectQuery: 条件を適用したクエリ
+    """
+    current_filter = args.get('filter', 'all')
+    subject = (args.get('subject') or '').strip()
 
-    if is_student_view:
+    if current_user.role == 'student':
         query = query.where(Grade.student_id == current_user.get_id())
     else:
-        student_number = (request.args.get('student_number') or '').strip()
+        student_number = (args.get('student_number') or '').strip()
         if student_number:
             query = query.where(Grade.student_id.contains(student_number))
 
@@ -40,31 +44,44 @@ def grade_list():
         if subject.isdigit():
             query = query.where(Grade.subject_id == int(subject))
         else:
-            subject_ids = [s.id for s in Subject.select(Subject.id).where(Subject.name.contains(subject))]
-            if subject_ids:
-                query = query.where(Grade.subject_id.in_(subject_ids))
-            else:
-                query = query.where(Grade.subject_id == -1)
+            query = query.where(Grade.subject_id.in_(
+                Subject.select(Subject.id).where(keyword_filter(Subject, subject, columns=['name']))
+            ))
 
     # 合格/不合格
     if current_filter == 'pass':
-        query = query.where(Grade.score >= 60)
+        query = query.where(Grade.score >= PASSING_SCORE)
     elif current_filter == 'fail':
-        query = query.where(Grade.score < 60)
+        query = query.where(Grade.score < PASSING_SCORE)
 
-    query = query.order_by(Grade.student_id.asc(), Grade.subject_id.asc())
-    
-    # --- ページネーション処理 ---
-    offset = int(request.args.get('offset', 0))
-    limit = 50
+    return query
+
+
+# -----------------------------
+# 成績一覧（/grade/list）
+# -----------------------------
 
-    # SQLレベルで取得制限
-    grade_items = list(query.offset(offset).limit(limit))
-    
-    # 次のページがあるか簡易判定（取得数がlimitと同じならまだあるかも）
-    has_more = len(grade_items) >= limit
+@grade_bp.route('/list')
+@login_required
+def grade_list():
+    """
+    - student: 自分の成績だけ表示（student_number の検索は無視）
+    - teacher/admin: 学籍番号・科目で検索できる
+    """
 
-    subject_map = {s.id: s.name for s in Subject.select(Subject.id, Subject.name)}
+    is_student_view = (current_user.role == 'student')
+    query = _filter_grades(Grade.select(), request.args)
+
+    # --- ページネーション処理 ---
+    # (学籍番号, 科目ID) の順に並べ、前のページの最後の行より後ろから取得する
+    grade_items, next_cursor = paginate(
+        query,
+        [Grade.student_id, Grade.subject_id],
+        request.args.get('cursor'),
+    )
+    has_more = next_cursor is not None
+
+    subject_map = subject_name_map()
 
     student_name_map = {}
     if not is_student_view:
@@ -79,26 +96,20 @@ def grade_list():
             
     # AJAXリクエスト
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render_template(
+        return rows_response(render_template(
             'grades/grade_rows.html',
             items=grade_items,
             subject_map=subject_map,
             student_name_map=student_name_map,
             is_student_view=is_student_view,
-        )
+        ), next_cursor)
 
     # 生徒の「今後の頑張り」初期値
     motivation_value = None
     if is_student_view:
-        user = User.get_by_id(current_user.get_id())
-        try:
-            m = Motivation.get_or_none(Motivation.student_id == user)
-            motivation_value = m.value if m else 50
-        except OperationalError:
-            # motivations テーブルが無い場合は作って復旧
-            Motivation.create_table(safe=True)
-            m = Motivation.get_or_none(Motivation.student_id == user)
-            motivation_value = m.value if m else 50
+        # motivations テーブルは起動時のスキーマ検証で作成済み
+        m = Motivation.get_or_none(Motivation.student_id == current_user.get_id())
+        motivation_value = m.value if m else 50
 
     return render_template(
         'grades/grade_list.html',
@@ -109,7 +120,8 @@ def grade_list():
         student_name_map=student_name_map,
         is_student_view=is_student_view,
         motivation_value=motivation_value,
-        has_more=has_more
+        has_more=has_more,
+        next_cursor=next_cursor,
     )
 
 
@@ -119,16 +131,10 @@ def grade_list():
 def motivation():
     # 生徒のみ利用可
 
-    user = User.get_by_id(current_user.get_id())
-
-    # テーブルが無いなら作って復旧
-    try:
-        Motivation.create_table(safe=True)
-    except Exception:
-        pass
+    user_id = current_user.get_id()
 
     if request.method == 'GET':
-        m = Motivation.get_or_none(Motivation.student_id == user)
+        m = Motivation.get_or_none(Motivation.student_id == user_id)
         return jsonify({"ok": True, "value": int(m.value if m else 50)})
 
     payload = request.get_json(silent=True) or {}
@@ -143,7 +149,7 @@ def motivation():
 
     value = max(-100, min(100, value))
 
-    m, created = Motivation.get_or_create(student_id=user, defaults={"value": value})
+    m, created = Motivation.get_or_create(student_id=user_id, defaults={"value": value})
     if not created:
         m.value = value
         m.updated_at = datetime.now()
@@ -283,20 +289,26 @@ def create():
 
         if grade:
             # アップデート
-            grade.unit = unit
-            grade.score = score
-            grade.save()
+            with db.atomic():
+                grade.unit = unit
+                grade.score = score
+                grade.save()
+                refresh_grade_summary([student_number])
+            bump_grade_version()
 
             flash('既存の成績を更新しました。', 'success')
             return redirect(url_for('grade.grade_list'))
         else:
             # 新規作成
-            Grade.create(
-                student_id=student_number,
-                subject_id=subject_id,
-                unit=unit,
-                score=score
-            )
+            with db.atomic():
+                Grade.create(
+                    student_id=student_number,
+                    subject_id=subject_id,
+                    unit=unit,
+                    score=score
+                )
+                refresh_grade_summary([student_number])
+            bump_grade_version()
             flash('成績を登録しました。', 'success')
 
             return redirect(url_for('grade.grade_list'))
@@ -362,9 +374,12 @@ def edit(student_number, subject_id):
                 active_page='grades',
             )
 
-        grade.unit = unit
-        grade.score = score
-        grade.save()
+        with db.atomic():
+            grade.unit = unit
+            grade.score = score
+            grade.save()
+            refresh_grade_summary([student_number])
+        bump_grade_version()
 
         flash('成績を更新しました。', 'success')
         return redirect(url_for('grade.grade_list'))
@@ -388,9 +403,63 @@ def edit(student_number, subject_id):
 def delete(student_number, subject_id):
     try:
         grade = Grade.get((Grade.student_id == student_number) & (Grade.subject_id == subject_id))
-        grade.delete_instance()
+        with db.atomic():
+            grade.delete_instance()
+            refresh_grade_summary([student_number])
+        bump_grade_version()
         flash('成績を削除しました。', 'success')
     except DoesNotExist:
         flash('対象の成績が見つかりませんでした。', 'error')
 
     return redirect(url_for('grade.grade_list'))
+
+
+# -----------------------------
+# 成績CSV取り込み（/grade/import）
+# -----------------------------
+
+@grade_bp.route('/import', methods=['POST'])
+@role_required('admin', 'teacher')
+@login_required
+def import_csv():
+    """
+    成績 CSV（student_id, subject_id, score）を一括で取り込む。
+    multipart の file、または本文の CSV をそのまま受け付け、行ごとのエラーを JSON で返す。
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    try:
+        report = import_grades(lines)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'CSV は UTF-8 で保存してください'}), 400
+
+    return jsonify(report)
+
+
+# -----------------------------
+# 成績エクスポート（/grade/export）
+# -----------------------------
+
+@grade_bp.route('/export')
+@login_required
+def export():
+    """
+    成績一覧と同じ検索条件の成績を、学生名・科目名付きで CSV / JSONL として出力する。
+    """
+    query = _filter_grades(
+        Grade
+        .select(Grade.student_id, Student.name, Grade.subject_id, Subject.name, Grade.unit, Grade.score)
+        .join(Student, JOIN.LEFT_OUTER, on=(Student.student_id == Grade.student_id))
+        .switch(Grade)
+        .join(Subject, JOIN.LEFT_OUTER, on=(Subject.id == Grade.subject_id))
+        .order_by(Grade.student_id, Grade.subject_id),
+        request.args,
+    )
+    return export_response(
+        query,
+        ['student_id', 'student_name', 'subject_id', 'subject_name', 'unit', 'score'],
+        'grades',
+        request.args.get('format', 'csv'),
+    )
@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for
 from flask_login import login_required, current_user
 
 from models import Subject, Enrollment, Student
-from utils import role_required
+from utils import role_required, paginate, rows_response, keyword_filter, export_response, bump_table_version, department_list
 
 subject_bp = Blueprint('subject', __name__, url_prefix='/subject')
 
@@ -22,46 +22,32 @@ def subject_list():
         query = query.where(Subject.category == category)
 
     if keyword:
-        query = query.where(
-            (Subject.name.contains(keyword)) |
-            (Subject.department.contains(keyword)) |
-            (Subject.day.contains(keyword))
-        )
-
-    subjects = list(query)
-
-    day_order = {'月': 1, '火': 2, '水': 3, '木': 4, '金': 5, '土': 6, '日': 7}
-    def sort_key(sub):
-        d = day_order.get(sub.day, 9)
-        try:
-            p = int(sub.period)
-        except (ValueError, TypeError):
-            p = 9
-        return (d, p)
+        query = query.where(keyword_filter(Subject, keyword))
 
-    sorted_subjects = sorted(subjects, key=sort_key)
-    
     # --- ページネーション処理 ---
-    offset = int(request.args.get('offset', 0))
-    limit = 50
-    
-    # Pythonリストのスライスでページング
-    paged_subjects = sorted_subjects[offset : offset + limit]
-    has_more = (offset + limit) < len(sorted_subjects)
+    # 曜日・時限の順に SQL で並べ、前のページの最後の科目より後ろから取得する
+    paged_subjects, next_cursor = paginate(
+        query,
+        [Subject.day_order, Subject.period, Subject.id],
+        request.args.get('cursor'),
+    )
+    has_more = next_cursor is not None
 
     # AJAXリクエスト（スクロール時）の場合
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render_template(
+        return rows_response(render_template(
             'subject/subject_rows.html',
             subjects=paged_subjects,
-        )
+        ), next_cursor)
 
     return render_template(
         'subject/subject_list.html',
         active_page='subjects',
-        subjects=sorted_subjects,
+        subjects=paged_subjects,
         title='科目管理',
+        current_category=category,
         has_more=has_more,
+        next_cursor=next_cursor,
     )
     
 @subject_bp.route('/create', methods=['GET', 'POST'])
@@ -91,6 +77,7 @@ def create():
             day=day,
             period=period
         )
+        bump_table_version('subjects')
         return redirect(url_for('subject.subject_list'))
 
     return render_template(
@@ -98,6 +85,7 @@ def create():
         mode='create', # 追加：HTMLでのタイトル切り替え用
         active_page='subjects',
         subject=None,
+        departments=department_list(),
     )
 
 @subject_bp.route('/edit/<int:subject_id>', methods=['GET', 'POST'])
@@ -122,6 +110,7 @@ def edit(subject_id):
         subject.day = request.form.get('day', subject.day)
         subject.period = int(request.form.get('period', subject.period))
         subject.save()
+        bump_table_version('subjects')
 
         return redirect(url_for('subject.subject_list'))
 
@@ -131,6 +120,7 @@ def edit(subject_id):
         title='科目編集',
         mode='edit', # 追加
         subject=subject,
+        departments=department_list(),
     )
 
 @subject_bp.route('/delete/<int:subject_id>')
@@ -141,6 +131,7 @@ def delete(subject_id):
     科目削除
     """
     Subject.delete_by_id(subject_id)
+    bump_table_version('subjects')
     return redirect(url_for('subject.subject_list'))
 
 @subject_bp.route('/manage/<int:subject_id>')
@@ -157,31 +148,29 @@ def manage(subject_id):
     if not subject:
         return "科目が見つかりません", 404
 
-    # 履修者リストのページネーション
-    offset = int(request.args.get('offset', 0))
-    limit = 50
-
     # 履修者のクエリ構築
     query_enrolled = (
         Student
         .select()
         .join(Enrollment, on=(Enrollment.student_id == Student.student_id))
         .where(Enrollment.subject_id == subject_id)
-        .order_by(Student.student_id)
+        .dicts()
     )
 
-    # 現在のページのデータを取得
-    enrolled_students = list(query_enrolled.dicts().offset(offset).limit(limit))
-    
-    # 次のページがあるか判定
-    has_more = len(enrolled_students) >= limit
+    # 学籍番号の順に、前のページの最後の学生より後ろから取得する
+    enrolled_students, next_cursor = paginate(
+        query_enrolled,
+        [Student.student_id],
+        request.args.get('cursor'),
+    )
+    has_more = next_cursor is not None
 
     # AJAXリクエスト
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render_template(
+        return rows_response(render_template(
             'enrollment/enrollment_manage_rows.html',
             enrolled_students=enrolled_students
-        )
+        ), next_cursor)
 
     # 初回ロード時のみ全学生リストを取得
     # 注意: 全学生リストはフォーム機能のためページネーションせず全件取得します
@@ -194,4 +183,29 @@ def manage(subject_id):
         enrolled_students=enrolled_students, 
         all_students=all_students, 
         has_more=has_more,
-    )
\ No newline at end of file
+        next_cursor=next_cursor,
+    )
+
+
+@subject_bp.route('/manage/<int:subject_id>/export')
+@role_required('admin', 'teacher')
+@login_required
+def export_enrollments(subject_id):
+    """
+    科目の履修者一覧を CSV / JSONL として出力する（学籍番号順）
+    """
+    subject = Subject.get_or_none(Subject.id == subject_id)
+    if subject is None:
+        return "科目が見つかりません", 404
+
+    query = (Student
+             .select(Student.student_id, Student.name, Student.grade, Student.department)
+             .join(Enrollment, on=(Enrollment.student_id == Student.student_id))
+             .where(Enrollment.subject_id == subject_id)
+             .order_by(Student.student_id))
+    return export_response(
+        query,
+        ['student_id', 'name', 'grade', 'department'],
+        f'enrollments_{subject.id}',
+        request.args.get('format', 'csv'),
+    )
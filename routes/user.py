@@ -1,8 +1,10 @@
+import io
+
 from flask import Blueprint, render_template, request, abort, jsonify, redirect, url_for
 from flask_login import login_required, current_user
 
 from models import Student, Teacher, User, Password
-from utils import role_required
+from utils import role_required, paginate, rows_response, encode_cursor, decode_cursor_map, keyword_filter, provision_users, read_user_rows, export_response, HashingBusy, invalidate_user, bump_table_version, department_list
 
 users_bp = Blueprint('user', __name__, url_prefix='/user')
 
@@ -15,42 +17,48 @@ def user_list():
     管理者以外のアクセスは禁止されています。
     """
     filter_role = request.args.get('role', 'all')
-    # 
-    offset = int(request.args.get('offset', 0))
+    cursor = request.args.get('cursor')
     limit = 50
 
-    users = []
-
+    # (ロール, クエリ, 並び順のキー) の一覧
+    sources = []
     # 学生
     if filter_role in ('student', 'all'):
-        students = (
-            Student
-            .select()
-            .offset(offset)
-            .limit(limit)
-        )
-        users += [dict(s.to_dict(), role='student') for s in students]
-
+        sources.append(('student', Student.select_with_user(), Student.student_id))
     # 教員
     if filter_role in ('teacher', 'all') and current_user.role == 'admin':
-        teachers = (
-            Teacher
-            .select()
-            .offset(offset)
-            .limit(limit)
-        )
-        users += [dict(t.to_dict(), role='teacher') for t in teachers]
+        sources.append(('teacher', Teacher.select_with_user(), Teacher.teacher_id))
+
+    # カーソルは [[ロール, そのロールの次ページのカーソル], ...]（読み終えたロールは含まない）
+    if cursor:
+        try:
+            pending = decode_cursor_map(cursor, [role for role, _, _ in sources])
+        except ValueError:
+            abort(400)
+    else:
+        pending = {role: None for role, _, _ in sources}
+
+    users = []
+    next_cursors = []
+    for role, query, key in sources:
+        if role not in pending:
+            continue
+        rows, next_role_cursor = paginate(query, [key], pending[role], limit)
+        users += [dict(r.to_dict(), role=role) for r in rows]
+        if next_role_cursor:
+            next_cursors.append([role, next_role_cursor])
 
     # まだユーザーが残っているかどうか
-    has_more = len(users) >= limit
+    next_cursor = encode_cursor(next_cursors) if next_cursors else None
+    has_more = next_cursor is not None
 
     # リストだけ返す
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render_template(
+        return rows_response(render_template(
             'user/user_rows.html',
             users=users,
             current_role=filter_role
-        )
+        ), next_cursor)
 
     return render_template(
         "user/user_list.html",
@@ -58,7 +66,8 @@ def user_list():
         title=filter_role,
         users=users,
         current_role=filter_role,
-        has_more=has_more
+        has_more=has_more,
+        next_cursor=next_cursor,
     )
 
 @users_bp.route('/search')
@@ -81,33 +90,25 @@ def user_search():
     # =========================
     if current_user.role == 'student':
         student = Student.get_or_none(Student.student_id == current_user.user_id)
-        if student and (
-            not keyword or
-            keyword in student.student_id or
-            keyword in student.name
-        ):
-            users.append(dict(student.to_dict(), role='student'))
+        if student:
+            student_dict = student.to_dict()
+            if not keyword or keyword in student_dict['student_id'] or keyword in student_dict['name']:
+                users.append(dict(student_dict, role='student'))
 
     # =========================
     # 教師・管理者
     # =========================
     else:
         if role in ('student', 'all'):
-            query = Student.select()
+            query = Student.select_with_user()
             if keyword:
-                query = query.where(
-                    (Student.student_id.contains(keyword)) |
-                    (Student.name.contains(keyword))
-                )
+                query = query.where(keyword_filter(Student, keyword))
             users += [dict(s.to_dict(), role='student') for s in query]
 
         if role in ('teacher', 'all'):
-            query = Teacher.select()
+            query = Teacher.select_with_user()
             if keyword:
-                query = query.where(
-                    (Teacher.teacher_id.contains(keyword)) |
-                    (Teacher.name.contains(keyword))
-                )
+                query = query.where(keyword_filter(Teacher, keyword))
             users += [dict(t.to_dict(), role='teacher') for t in query]
 
     return render_template(
@@ -164,6 +165,7 @@ def create_user():
 
         # パスワードを保存
         Password.create_password(user_id=user_id, raw_password=password_raw, role=role)
+        bump_table_version('users', f'{role}s')
 
         return jsonify({'message': 'ユーザーが作成されました'}), 201
 
@@ -171,6 +173,41 @@ def create_user():
         # ユーザー作成中にエラーが発生した場合
         return jsonify({'error': str(e)}), 500
 
+@users_bp.route('/bulk_create', methods=['POST'])
+@role_required('admin')
+@login_required
+def bulk_create_users():
+    """
+    ユーザー一括作成
+    JSON（{"users": [...]} または配列）、CSV ファイル（file）、CSV 本文のいずれかを受け付ける。
+    """
+    upload = request.files.get('file')
+    try:
+        if request.is_json:
+            data = request.get_json(silent=True)
+            rows = data.get('users', []) if isinstance(data, dict) else data
+        else:
+            stream = upload.stream if upload else request.stream
+            rows = read_user_rows(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    except UnicodeDecodeError:
+        return jsonify({'error': 'CSV は UTF-8 で保存してください'}), 400
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'ユーザーがありません'}), 400
+
+    try:
+        # リクエストのスレッドからはプロセスを fork せず、ハッシュ計算用のスレッドプールで計算する
+        report = provision_users(rows, bounded=True)
+    except HashingBusy:
+        # ハッシュ計算の待ち行列が一杯の場合は待たずに 503 を返す
+        response = jsonify({'error': 'パスワードの処理が混み合っています。しばらくしてから再度お試しください'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify(report), 201 if report['created'] else 200
+
 @users_bp.route('/delete/<string:user_id>', methods=['POST'])
 @role_required('admin')
 @login_required
@@ -186,7 +223,10 @@ def delete_user(user_id):
         user.delete_instance(recursive=True)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    
+    invalidate_user(user_id)
+    # 学生が減ると全体統計も変わるため、students のバージョンも進める
+    bump_table_version('users', f'{user.role}s')
+
     return redirect(url_for('user.user_list'))
 
 @users_bp.route('/new', methods=['GET'])
@@ -198,6 +238,7 @@ def new_user_form():
     """
     return render_template("user/user_form.html",
                            user=None,
+                           departments=department_list(),
                            active_page='users',
                            title='ユーザー新規登録',) 
 
@@ -231,6 +272,7 @@ def edit(user_id):
     return render_template(
         "user/user_form.html",
         user=user_data,
+        departments=department_list(),
         active_page='users',
         title='ユーザー新規登録',
     ) 
@@ -270,6 +312,8 @@ def update(user_id):
     profile.grade = data.get('grade')
     profile.department = data.get('department')
     profile.save()
+    invalidate_user(user_id)
+    bump_table_version(f'{user.role}s')
     
     # 更新パスワードを設定
     password = data.get('password')
@@ -288,6 +332,23 @@ def list_students():
     """
     学生一覧（教師・管理者）
     """
-    users = User.select().where(User.role == 'student')
-    students = Student.select().where(Student.student_id << [s.user_id for s in users])
-    return jsonify([s.to_dict() for s in students])
\ No newline at end of file
+    students = Student.select_with_user().where(User.role == 'student')
+    return jsonify([s.to_dict() for s in students])
+
+@users_bp.route('/students/export', methods=['GET'])
+@role_required('admin', 'teacher')
+@login_required
+def export_students():
+    """
+    学生名簿を CSV / JSONL として出力する（学籍番号順）
+    """
+    query = (Student
+             .select(Student.student_id, Student.name, Student.grade, Student.department,
+                     Student.gender, Student.birth_date)
+             .order_by(Student.student_id))
+    return export_response(
+        query,
+        ['student_id', 'name', 'grade', 'department', 'gender', 'birth_date'],
+        'students',
+        request.args.get('format', 'csv'),
+    )
@@ -0,0 +1,54 @@
+"""
+テストで共通して使うフィクスチャ
+"""
+import contextlib
+import io
+
+import pytest
+
+from utils import Config, bump_table_version, db, flush_audit, invalidate_user
+from utils.cache import VERSIONED_TABLES
+
+
+@pytest.fixture(scope="session")
+def app():
+    from main import app
+
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    マイグレーションを適用した空の一時データベースに接続先を切り替える。
+    終了時に接続先とハッシュ方式を元に戻す。
+    """
+    from models import initialize_database
+
+    original = db.database
+    original_pragmas = db._pragmas
+    original_method = Config.PASSWORD_HASH_METHOD
+    # ハッシュの計算はテストの対象ではないため、軽い設定にする
+    Config.PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+    if not db.is_closed():
+        db.close()
+    db.close_all()
+    db.init(str(tmp_path / "test.db"), pragmas=original_pragmas)
+    with contextlib.redirect_stdout(io.StringIO()):
+        initialize_database()
+    # 前のテストのデータベースで作ったキャッシュを使わないようにする
+    bump_table_version(*VERSIONED_TABLES)
+    invalidate_user()
+
+    db.connect()
+    try:
+        yield db
+    finally:
+        flush_audit()  # ログイン記録を一時データベースに書き込んでから切り替える
+        if not db.is_closed():
+            db.close()
+        db.close_all()
+        db.init(original, pragmas=original_pragmas)
+        Config.PASSWORD_HASH_METHOD = original_method
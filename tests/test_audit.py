@@ -0,0 +1,56 @@
+"""
+ログイン記録の遅延書き込み（utils.audit）のテスト
+"""
+import logging
+
+import pytest
+
+from models import LoginEvent, User
+from utils import Config, audit, flush_audit, record_login, record_logout
+
+
+@pytest.fixture
+def queue(database):
+    """
+    テストの前後でキューを空にする
+    """
+    with audit._lock:
+        audit._pending.clear()
+        audit._events.clear()
+    yield
+    with audit._lock:
+        audit._pending.clear()
+        audit._events.clear()
+
+
+def test_flush_writes_latest_values_and_events(queue):
+    User.create(user_id="STU001", role="student")
+    record_login("STU001", "10.0.0.1")
+    record_logout("STU001")
+    record_login("STU001", "10.0.0.2")
+
+    assert flush_audit() == 3
+
+    user = User.get(User.user_id == "STU001")
+    assert user.last_login_ip == "10.0.0.2"
+    assert user.last_logout is not None
+    assert [e.event for e in LoginEvent.select().order_by(LoginEvent.id)] == ["login", "logout", "login"]
+    assert flush_audit() == 0
+
+
+def test_failed_flush_requeues_up_to_limit(queue, monkeypatch, caplog):
+    def fail(pending, events):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(audit, "_write", fail)
+    monkeypatch.setattr(Config, "AUDIT_QUEUE_LIMIT", 3)
+    for i in range(5):
+        record_login(f"STU00{i}", None)
+
+    with caplog.at_level(logging.WARNING, logger=audit.__name__), pytest.raises(RuntimeError):
+        flush_audit()
+
+    # 新しい履歴から上限まで残し、ユーザーごとの最新の値はすべて残す
+    assert [event[0] for event in audit._events] == ["STU002", "STU003", "STU004"]
+    assert len(audit._pending) == 5
+    assert "古い履歴 2 件を破棄しました" in caplog.text
@@ -0,0 +1,104 @@
+"""
+履修登録の一括登録（Enrollment.enroll_students と /enrollments/create）のテスト
+"""
+import pytest
+
+from models import Enrollment, Student, Subject, User
+
+
+@pytest.fixture
+def subject(database):
+    """
+    情報工学の1年生向けの科目と、受講できる学生・できない学生を作成する
+
+    Returns:
+        Subject: 科目
+    """
+    for student_id, grade, department in (
+        ("STU001", "1", "情報工学"),
+        ("STU002", "1", "情報工学"),
+        ("STU003", "2", "情報工学"),  # 学年が対象外
+        ("STU004", "1", "機械工学"),  # 専攻が対象外
+    ):
+        User.create(user_id=student_id, role="student")
+        Student.create(student_id=student_id, name=student_id, grade=grade, department=department)
+    return Subject.create(name="プログラミング", department="情報工学", category="required",
+                          grade=1, credits=2, day="月", period=1)
+
+
+def enrolled_ids(subject: Subject) -> list[str]:
+    """
+    科目に履修登録されている学籍番号
+    """
+    return sorted(e.student_id for e in Enrollment.select().where(Enrollment.subject == subject))
+
+
+def test_enrolls_eligible_students_and_reports_skips(subject):
+    Enrollment.create(subject=subject, student_id="STU002")
+
+    result = Enrollment.enroll_students(subject, ["STU001", "STU002", "STU003", "STU004", "STU999", "STU001", ""])
+
+    assert result["enrolled"] == ["STU001"]
+    assert [(skip["student_id"], skip["reason"]) for skip in result["skipped"]] == [
+        ("STU002", "already_enrolled"),
+        ("STU003", "not_eligible"),
+        ("STU004", "not_eligible"),
+        ("STU999", "not_found"),
+    ]
+    assert enrolled_ids(subject) == ["STU001", "STU002"]
+
+
+def test_enrolling_twice_does_not_duplicate(subject):
+    Enrollment.enroll_students(subject, ["STU001", "STU002"])
+    result = Enrollment.enroll_students(subject, ["STU001", "STU002"])
+
+    assert result["enrolled"] == []
+    assert {skip["reason"] for skip in result["skipped"]} == {"already_enrolled"}
+    assert enrolled_ids(subject) == ["STU001", "STU002"]
+
+
+def test_accepts_all_departments_and_multiple_grades(subject):
+    subject.department = "全専攻"
+    subject.grade = "1,2"
+    subject.save()
+
+    result = Enrollment.enroll_students(subject, ["STU001", "STU003", "STU004"])
+
+    assert result["enrolled"] == ["STU001", "STU003", "STU004"]
+
+
+@pytest.fixture
+def client(app, subject):
+    client = app.test_client()
+    client.post("/auth/login", data={"user_id": "admin", "password": "admin"})
+    return client
+
+
+def test_create_json_returns_result(client, subject):
+    response = client.post("/enrollments/create", json={"subject_id": subject.id, "student_ids": ["STU001", "STU999"]})
+
+    assert response.status_code == 200
+    assert response.get_json()["enrolled"] == ["STU001"]
+    assert [skip["reason"] for skip in response.get_json()["skipped"]] == ["not_found"]
+
+
+@pytest.mark.parametrize("body", [
+    {"student_ids": "STU001"},
+    {"student_ids": ["STU001", 2]},
+    {"student_ids": {"STU001": True}},
+    ["STU001"],
+])
+def test_create_json_rejects_malformed_student_ids(client, subject, body):
+    if isinstance(body, dict):
+        body = dict(body, subject_id=subject.id)
+
+    response = client.post("/enrollments/create", json=body)
+
+    assert response.status_code == 400
+    assert enrolled_ids(subject) == []
+
+
+def test_create_json_unknown_subject(client):
+    response = client.post("/enrollments/create", json={"subject_id": 9999, "student_ids": ["STU001"]})
+
+    assert response.status_code == 404
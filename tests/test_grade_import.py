@@ -0,0 +1,107 @@
+"""
+成績 CSV の一括取り込み（utils.grade_import.import_grades）のテスト
+"""
+import io
+
+import pytest
+
+from models import Enrollment, Grade, GradeSummary, Student, Subject, User
+from utils import import_grades
+
+
+@pytest.fixture
+def course(database):
+    """
+    2単位と3単位の科目、両方を履修した学生 STU001、1科目だけ履修した学生 STU002 を作成する
+
+    Returns:
+        tuple[Subject, Subject]: (2単位の科目, 3単位の科目)
+    """
+    math = Subject.create(name="数学", department="全専攻", category="required", grade=1, credits=2, day="月", period=1)
+    physics = Subject.create(name="物理", department="全専攻", category="elective", grade=1, credits=3, day="火", period=2)
+    for student_id, subjects in (("STU001", (math, physics)), ("STU002", (math,))):
+        User.create(user_id=student_id, role="student")
+        Student.create(student_id=student_id, name=student_id, grade="1", department="情報工学")
+        for subject in subjects:
+            Enrollment.create(subject=subject, student_id=student_id)
+    return math, physics
+
+
+def csv_lines(*rows: str) -> io.StringIO:
+    """
+    CSV の各行をファイルのように読めるオブジェクトにする
+    """
+    return io.StringIO("\n".join(rows) + "\n")
+
+
+def grades() -> dict:
+    """
+    {(学籍番号, 科目ID): (単位数, 点数)} を返す
+    """
+    return {(g.student_id, g.subject_id): (g.unit, g.score) for g in Grade.select()}
+
+
+def test_imports_rows_with_credits_from_subject(course):
+    math, physics = course
+    report = import_grades(csv_lines(
+        "student_id,subject_id,score",
+        f"STU001,{math.id},80",
+        f"STU001,{physics.id},50",
+        f"STU002,{math.id},90",
+    ), chunk_size=2)
+
+    assert report == {"total": 3, "imported": 3, "error_count": 0, "errors": []}
+    assert grades() == {
+        ("STU001", math.id): (2, 80),
+        ("STU001", physics.id): (3, 50),
+        ("STU002", math.id): (2, 90),
+    }
+
+
+def test_reports_invalid_rows(course):
+    math, physics = course
+    report = import_grades(csv_lines(
+        f"STU001,{math.id},80",
+        "STU001,9999,70",
+        f"STU002,{physics.id},70",
+        f"STU009,{math.id},70",
+        f"STU001,{physics.id},101",
+        f"STU001,{physics.id}",
+        "STU001,abc,70",
+    ))
+
+    assert report["total"] == 7
+    assert report["imported"] == 1
+    assert report["error_count"] == 6
+    assert [(error["line"], error["message"]) for error in report["errors"]] == [
+        (2, "科目が存在しません"),
+        (3, "この学生は科目を履修していません"),
+        (4, "この学生は科目を履修していません"),
+        (5, "点数は0〜100で入力してください"),
+        (6, "列の数が 3 ではありません"),
+        (7, "科目IDは数字で入力してください"),
+    ]
+    assert grades() == {("STU001", math.id): (2, 80)}
+
+
+def test_reimport_updates_instead_of_duplicating(course):
+    math, physics = course
+    import_grades(csv_lines(f"STU001,{math.id},80", f"STU001,{physics.id},50"))
+    report = import_grades(csv_lines(f"STU001,{math.id},40", f"STU001,{physics.id},50"))
+
+    assert report["imported"] == 2
+    assert Grade.select().count() == 2
+    assert grades() == {("STU001", math.id): (2, 40), ("STU001", physics.id): (3, 50)}
+
+
+def test_refreshes_grade_summary(course):
+    math, physics = course
+    import_grades(csv_lines(f"STU001,{math.id},80", f"STU001,{physics.id},50"))
+    summary = GradeSummary.get(GradeSummary.student_id == "STU001")
+    assert (summary.total_units, summary.passed_units, summary.failed_units) == (5, 2, 3)
+
+    import_grades(csv_lines(f"STU001,{physics.id},90"))
+    summary = GradeSummary.get(GradeSummary.student_id == "STU001")
+    assert (summary.total_units, summary.passed_units, summary.failed_units) == (5, 5, 0)
+    assert summary.gpa > 0
+    assert not GradeSummary.select().where(GradeSummary.student_id == "STU002").exists()
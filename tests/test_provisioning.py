@@ -0,0 +1,134 @@
+"""
+ユーザーの一括登録（utils.provisioning.provision_users）のテスト
+"""
+import contextlib
+
+import pytest
+
+from models import Password, Student, Teacher, User
+from utils import HashingBusy, provision_users
+from utils.hashing import _get_executor
+
+
+def user_row(user_id: str, role: str = "student", **values) -> dict:
+    """
+    一括登録する1件分の辞書を返す
+    """
+    row = {
+        "user_id": user_id,
+        "role": role,
+        "name": f"{user_id} の氏名",
+        "birth_date": "2004-04-01",
+        "gender": "male",
+        "department": "情報工学",
+        "grade": "1" if role == "student" else "",
+        "password": "secret",
+    }
+    row.update(values)
+    return row
+
+
+def user_ids() -> list[str]:
+    """
+    登録されているユーザーID（マイグレーションで作成される管理者を除く）
+    """
+    return [user_id for (user_id,) in User.select(User.user_id).where(User.role != "admin").tuples()]
+
+
+@contextlib.contextmanager
+def hashing_busy():
+    """
+    ハッシュ計算の待ち行列を埋め、HashingBusy が送出される状態にする
+    """
+    _, slots = _get_executor()
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    try:
+        yield
+    finally:
+        for _ in range(taken):
+            slots.release()
+
+
+def test_creates_users_with_profiles_and_passwords(database):
+    report = provision_users([user_row("STU100"), user_row("TEA100", role="teacher")])
+
+    assert report["created"] == 2
+    assert report["errors"] == []
+    assert dict(User.select(User.user_id, User.role).where(User.role != "admin").tuples()) == {
+        "STU100": "student", "TEA100": "teacher",
+    }
+
+    student = Student.get(Student.student_id == "STU100")
+    assert (student.name, student.department, student.grade) == ("STU100 の氏名", "情報工学", "1")
+    assert Teacher.get(Teacher.teacher_id == "TEA100").name == "TEA100 の氏名"
+    assert not Teacher.select().where(Teacher.teacher_id == "STU100").exists()
+    assert Password.get(Password.user_id == "STU100").verify_password("secret")
+
+
+def test_reports_invalid_rows_with_index(database):
+    rows = [
+        user_row("STU100"),
+        user_row("", name="ID なし"),
+        user_row("STU101", role="admin"),
+        user_row("STU102", birth_date="2004/04/01"),
+        "not a dict",
+        user_row("STU103", password=""),
+    ]
+    report = provision_users(rows)
+
+    assert report["created"] == 1
+    assert [(error["index"], error["user_id"]) for error in report["errors"]] == [
+        (1, ""), (2, "STU101"), (3, "STU102"), (4, None), (5, "STU103"),
+    ]
+    assert user_ids() == ["STU100"]
+
+
+def test_rejects_duplicates_in_batch_and_existing_users(database):
+    provision_users([user_row("STU100")])
+
+    report = provision_users([user_row("STU100"), user_row("STU200"), user_row("STU200", name="2件目")])
+
+    assert report["created"] == 1
+    assert [(error["index"], error["message"]) for error in report["errors"]] == [
+        (0, "このユーザーIDはすでに登録されています"),
+        (2, "ユーザーIDが重複しています"),
+    ]
+    assert Student.get(Student.student_id == "STU200").name == "STU200 の氏名"
+    assert sorted(user_ids()) == ["STU100", "STU200"]
+
+
+def test_insert_is_all_or_nothing(database, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(Password, "insert_many", fail)
+    with pytest.raises(RuntimeError):
+        provision_users([user_row("STU100"), user_row("TEA100", role="teacher")])
+
+    assert user_ids() == []
+    assert Student.select().count() == 0
+    assert Teacher.select().count() == 0
+
+
+def test_bounded_hashing_raises_when_busy(database):
+    with hashing_busy(), pytest.raises(HashingBusy):
+        provision_users([user_row("STU100")], bounded=True)
+
+    assert user_ids() == []
+    assert provision_users([user_row("STU100")], bounded=True)["created"] == 1
+
+
+def test_bulk_create_route_returns_503_when_busy(app, database):
+    client = app.test_client()
+    client.post("/auth/login", data={"user_id": "admin", "password": "admin"})
+
+    with hashing_busy():
+        response = client.post("/user/bulk_create", json=[user_row("STU100")])
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.post("/user/bulk_create", json=[user_row("STU100")])
+    assert response.status_code == 201
+    assert response.get_json()["created"] == 1
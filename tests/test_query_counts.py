@@ -0,0 +1,88 @@
+"""
+学生・教員の一覧系のエンドポイントで、SQL の実行回数が件数によらず一定であることを確認するテスト。
+
+    python -m pytest tests
+
+学生数の異なる一時データベースを作り、utils.db がリクエストごとに記録する SQL の件数を比較する。
+（N+1 クエリがあると学生数に比例して件数が増える）
+"""
+import contextlib
+import io
+
+import pytest
+from flask import request_finished
+
+from utils import Config, db, flush_audit, request_sql_stats
+
+# 比較する学生数（1ページの件数 50 より少なくし、ページングで件数が揃わないようにする）
+SIZES = (10, 40)
+
+# (ロール, ユーザーID, パスワード, URL)
+ENDPOINTS = [
+    ("admin", "admin", "admin", "/user/list"),
+    ("admin", "admin", "admin", "/user/list?role=student"),
+    ("teacher", "TEA001", "password123", "/user/list"),
+    ("admin", "admin", "admin", "/user/search?keyword=STU"),
+    ("admin", "admin", "admin", "/user/students"),
+    ("admin", "admin", "admin", "/analytic/?filter=student&student_id=STU001"),
+]
+
+
+def build_database(path: str, students: int) -> None:
+    """
+    init_db の生成処理で学生数を指定したデータベースを作成する
+    """
+    import init_db
+
+    db.init(path, pragmas=db._pragmas)
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db.generate_random_data(student_count=students, teacher_count=2, subject_count=4, seed=1)
+    db.close()
+
+
+@pytest.fixture(scope="module")
+def query_counts(app, tmp_path_factory):
+    """
+    学生数ごとに各エンドポイントの SQL の件数を計測し、{学生数: {URL: 件数}} を返す
+    """
+    original = db.database
+    original_pragmas = db._pragmas
+    original_method = Config.PASSWORD_HASH_METHOD
+    # ハッシュの計算はテストの対象ではないため、軽い設定にする
+    Config.PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+    counts = []
+
+    def record(sender, **extra):
+        stats = request_sql_stats()
+        if stats:
+            counts.append(stats["count"])
+
+    results = {}
+    try:
+        for students in SIZES:
+            build_database(str(tmp_path_factory.mktemp("db") / "test.db"), students)
+            results[students] = {}
+            with request_finished.connected_to(record, app), contextlib.redirect_stdout(io.StringIO()):
+                for role, user_id, password, url in ENDPOINTS:
+                    with app.test_client() as client:
+                        client.post("/auth/login", data={"user_id": user_id, "password": password})
+                        # 初回はキャッシュの作成などを含むため計測から除く
+                        assert client.get(url).status_code == 200, url
+                        counts.clear()
+                        assert client.get(url).status_code == 200, url
+                        results[students][(role, url)] = counts[-1]
+            flush_audit()  # ログイン記録を一時データベースに書き込んでから切り替える
+            db.close_all()
+    finally:
+        Config.PASSWORD_HASH_METHOD = original_method
+        flush_audit()
+        db.close_all()
+        db.init(original, pragmas=original_pragmas)
+    return results
+
+
+@pytest.mark.parametrize("role, url", [(role, url) for role, _, _, url in ENDPOINTS])
+def test_query_count_is_constant(query_counts, role, url):
+    small, large = (query_counts[students][(role, url)] for students in SIZES)
+    assert small == large, f"{role} {url}: 学生 {SIZES[0]}人で {small}件、{SIZES[1]}人で {large}件"
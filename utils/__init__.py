@@ -1,5 +1,37 @@
-from .db import db
+from .db import db, normalize_sql, register_db_hooks, request_sql_stats
 from .config import Config
 from .decorators import role_required
 from .extensions import login_manager, register_login_signals
-from .gpa import calculate_gpa, score_to_eval
+from .gpa import (
+    bump_grade_version,
+    calculate_gpa,
+    calculate_gpas,
+    check_grade_summary,
+    get_cohort_stats,
+    grade_version,
+    rebuild_grade_summary,
+    refresh_grade_summary,
+    score_to_eval,
+)
+from .grade_stats import GradeColumns, get_grade_columns, histogram
+from .pagination import encode_cursor, decode_cursor, decode_cursor_map, paginate, rows_response
+from .search import create_search_indexes, keyword_filter, rebuild_search_indexes
+from .grade_import import import_grades
+from .hashing import HashingBusy, hash_password, needs_rehash, verify_password_hash
+from .provisioning import hash_passwords, hash_passwords_bounded, provision_users, read_user_rows
+from .export import export_response, iter_csv, iter_jsonl
+from .cache import (
+    bump_table_version,
+    cache_stats,
+    cached,
+    create_version_triggers,
+    department_list,
+    register_cache_hooks,
+    role_titles,
+    subject_name_map,
+    sync_table_versions,
+    table_version,
+)
+from .user_cache import invalidate_user, load_cached_user, user_cache_stats
+from .audit import flush_audit, record_login, record_logout
+from .server import default_workers, serve
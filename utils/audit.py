@@ -0,0 +1,178 @@
+"""
+ログイン・ログアウト記録の遅延書き込み
+
+ログインのたびに users を UPDATE してコミットすると、学期初めなどに大量のログインが重なったとき
+成績の入力と書き込みロックを奪い合う。そこで記録をプロセス内のキューにため、
+一定間隔または一定件数ごとに1つのトランザクションでまとめて書き込む。
+同じユーザーの記録は最新の値にまとめ、ログイン履歴（login_events）も同じトランザクションで追加する。
+"""
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from peewee import chunked
+
+from .config import Config
+from .db import db
+from .user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# 履歴を1回の INSERT で追加する件数
+EVENT_INSERT_BATCH_SIZE = 500
+
+# {user_id: {列名: 値}}（同じユーザーの記録は新しい値で上書きする）
+_pending = {}
+# ログイン履歴 [(user_id, event, ip, 日時)]
+_events = []
+_lock = threading.Lock()
+# 件数が上限に達したときに書き込みスレッドを起こす
+_wakeup = threading.Event()
+# 書き込みスレッドとそれを起動したプロセスの ID（fork 後は子プロセスで起動し直す）
+_worker = None
+_worker_pid = None
+
+
+def _ensure_worker() -> None:
+    """
+    書き込みスレッドが動いていなければ起動する
+    """
+    global _worker, _worker_pid
+    if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+        return
+    if _worker_pid is None:
+        # 終了時にキューに残った記録を書き込む
+        atexit.register(flush_audit)
+    _worker = threading.Thread(target=_run, name='audit-writer', daemon=True)
+    _worker_pid = os.getpid()
+    _worker.start()
+
+
+def _run() -> None:
+    """
+    書き込みスレッドの処理（AUDIT_FLUSH_INTERVAL 秒ごと、または件数の上限で書き込む）
+    """
+    while True:
+        _wakeup.wait(Config.AUDIT_FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            flush_audit()
+        except Exception:
+            with _lock:
+                users, events = len(_pending), len(_events)
+            logger.exception(
+                "ログイン記録の書き込みに失敗しました（キューに %d 人の記録と %d 件の履歴を戻しました）",
+                users, events,
+            )
+
+
+def _enqueue(user_id: str, fields: dict, event: str, ip: str | None, at: datetime) -> None:
+    """
+    記録をキューに追加する
+    """
+    with _lock:
+        _pending.setdefault(user_id, {}).update(fields)
+        _events.append((user_id, event, ip, at))
+        full = len(_events) >= Config.AUDIT_FLUSH_SIZE
+
+    _ensure_worker()
+    if full:
+        _wakeup.set()
+
+
+def record_login(user_id: str, ip: str | None, at: datetime | None = None) -> None:
+    """
+    ログインを記録する関数（書き込みは後でまとめて行う）
+
+    Args:
+        user_id (str): ユーザーID
+        ip (str | None): 接続元IPアドレス
+        at (datetime | None): ログイン日時（省略時は現在時刻）
+    """
+    at = at or datetime.now()
+    _enqueue(user_id, {'last_login': at, 'last_login_ip': ip}, 'login', ip, at)
+
+
+def record_logout(user_id: str, at: datetime | None = None) -> None:
+    """
+    ログアウトを記録する関数（書き込みは後でまとめて行う）
+
+    Args:
+        user_id (str): ユーザーID
+        at (datetime | None): ログアウト日時（省略時は現在時刻）
+    """
+    at = at or datetime.now()
+    _enqueue(user_id, {'last_logout': at}, 'logout', None, at)
+
+
+def _write(pending: dict, events: list) -> None:
+    """
+    まとめた記録を1つのトランザクションで書き込む
+    """
+    from models.login_event import LoginEvent
+    from models.user import User
+
+    # 更新する列の組み合わせごとに1つの UPDATE 文を executemany で実行する
+    groups = {}
+    for user_id, fields in pending.items():
+        names = tuple(sorted(fields))
+        groups.setdefault(names, []).append(
+            [User._meta.fields[name].db_value(fields[name]) for name in names] + [user_id]
+        )
+
+    with db.atomic():
+        for names, params in groups.items():
+            assignments = ', '.join(f'{name} = ?' for name in names)
+            db.cursor().executemany(
+                f'UPDATE {User._meta.table_name} SET {assignments} WHERE user_id = ?', params
+            )
+        for batch in chunked(events, EVENT_INSERT_BATCH_SIZE):
+            LoginEvent.insert_many(
+                batch,
+                fields=[LoginEvent.user_id, LoginEvent.event, LoginEvent.ip, LoginEvent.created_at],
+            ).execute()
+
+
+def flush_audit() -> int:
+    """
+    キューにたまった記録をデータベースに書き込む関数
+    書き込みに失敗した場合は記録をキューに戻す（その間に追加された新しい値は上書きしない）。
+    失敗が続いてもメモリを使い続けないよう、履歴は新しいものから AUDIT_QUEUE_LIMIT 件までしか残さない。
+
+    Returns:
+        int: 書き込んだ履歴の件数
+    """
+    global _pending, _events
+    with _lock:
+        if not _pending and not _events:
+            return 0
+        pending, events = _pending, _events
+        _pending, _events = {}, []
+
+    opened = db.is_closed()
+    if opened:
+        db.connect()
+    try:
+        _write(pending, events)
+    except Exception:
+        with _lock:
+            for user_id, fields in pending.items():
+                _pending[user_id] = {**fields, **_pending.get(user_id, {})}
+            _events[:0] = events
+            dropped = len(_events) - Config.AUDIT_QUEUE_LIMIT
+            if dropped > 0:
+                del _events[:dropped]
+        if dropped > 0:
+            logger.warning("ログイン履歴のキューが上限 %d 件を超えたため、古い履歴 %d 件を破棄しました",
+                           Config.AUDIT_QUEUE_LIMIT, dropped)
+        raise
+    finally:
+        if opened:
+            db.close()
+
+    # last_login などが変わったため、キャッシュしたユーザーを読み込み直させる
+    for user_id in pending:
+        invalidate_user(user_id)
+    return len(events)
@@ -0,0 +1,251 @@
+"""
+参照データのプロセス内キャッシュ
+
+科目名の対応表・専攻の一覧など、ほとんど変わらないのに毎リクエスト読み込んでいたデータを保持する。
+テーブルごとのバージョンを持ち、書き込んだ処理が bump_table_version で進めると、
+そのテーブルに依存するキャッシュは次の読み込み時に作り直される。
+
+複数のワーカープロセスで動かす場合に備え、データベースにも table_versions テーブルを置き、
+対象のテーブルへの書き込みのたびにトリガーでバージョンを進める。
+各ワーカーはリクエストの開始時に sync_table_versions で読み込み、他のプロセスが書き込んだテーブルの
+キャッシュだけを捨てる。PRAGMA data_version が変わっていない（他の接続がコミットしていない）場合は
+table_versions の読み込みも省く。
+
+キャッシュした値は全リクエストで共有するため、呼び出し側で変更しないこと。
+"""
+import sqlite3
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from .config import Config
+from .db import db
+from .user_cache import invalidate_user
+
+# データベース側でバージョンを管理するテーブル（書き込みのたびにトリガーで table_versions を更新する）
+VERSIONED_TABLES = ('grades', 'subjects', 'enrollments', 'students', 'teachers', 'users')
+
+# UPDATE のトリガーを特定の列の更新に限るテーブル
+# （users はログインのたびに last_login などを更新するため、ユーザーのキャッシュに関わる列だけにする）
+VERSIONED_COLUMNS = {'users': ('user_id', 'role')}
+
+# 書き込まれるとログインユーザーのキャッシュ（user_cache）が古くなるテーブル
+USER_TABLES = {'users', 'students', 'teachers'}
+
+# {テーブル名: このプロセスで進めたバージョン}
+_versions = {}
+# {テーブル名: 最後に読み込んだ table_versions の値}
+_db_versions = {}
+# {id(接続): (接続, 最後に確認した PRAGMA data_version)}
+_seen_data_versions = {}
+# {キャッシュ名: (依存するテーブル, バージョンのタプル, 値)}
+_entries = {}
+# {キャッシュ名: {"hits": ヒット数, "misses": ミス数}}
+_stats = {}
+_lock = threading.Lock()
+
+
+def bump_table_version(*tables: str) -> None:
+    """
+    テーブルのバージョンを進め、依存するキャッシュを無効化する関数
+    書き込んだトランザクションのコミット後に呼び出すこと。
+
+    Args:
+        *tables (str): 書き込んだテーブル名
+    """
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+def table_version(table: str) -> int:
+    """
+    テーブルの現在のバージョンを返す関数
+
+    Args:
+        table (str): テーブル名
+
+    Returns:
+        int: バージョン
+    """
+    with _lock:
+        return _versions.get(table, 0)
+
+
+def _key(tables: tuple) -> tuple:
+    """
+    依存するテーブルの (データベースのバージョン, このプロセスのバージョン) のタプルを返す（_lock 内で呼ぶ）
+    """
+    return tuple((_db_versions.get(table, 0), _versions.get(table, 0)) for table in tables)
+
+
+def cached(name: str, tables: tuple, loader):
+    """
+    依存するテーブルのバージョンが変わるまで loader の結果を保持して返す関数
+    読み込み中にバージョンが進んだ場合は、結果を返すが保存はしない。
+
+    Args:
+        name (str): キャッシュ名
+        tables (tuple): 依存するテーブル名
+        loader: 値を作る関数（引数なし）
+
+    Returns:
+        loader の戻り値
+    """
+    with _lock:
+        key = _key(tables)
+        stats = _stats.setdefault(name, {"hits": 0, "misses": 0})
+        entry = _entries.get(name)
+        if entry is not None and entry[1] == key:
+            stats["hits"] += 1
+            return entry[2]
+        stats["misses"] += 1
+
+    value = loader()
+
+    with _lock:
+        if _key(tables) == key:
+            _entries[name] = (tables, key, value)
+    return value
+
+
+def _version_trigger_sql(table: str) -> list[str]:
+    """
+    テーブルへの書き込みで table_versions を進めるトリガーを作成する SQL を返す関数
+    """
+    bump = f"UPDATE table_versions SET version = version + 1 WHERE name = '{table}';"
+    update = 'UPDATE'
+    if table in VERSIONED_COLUMNS:
+        update += ' OF ' + ', '.join(VERSIONED_COLUMNS[table])
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN {bump} END"
+        for suffix, event in (('ai', 'INSERT'), ('au', update), ('ad', 'DELETE'))
+    ]
+
+
+def create_version_triggers() -> None:
+    """
+    table_versions テーブルと、VERSIONED_TABLES への書き込みでバージョンを進めるトリガーを作成する関数
+    （存在しないテーブルのトリガーは作成しない）
+    """
+    db.execute_sql(
+        "CREATE TABLE IF NOT EXISTS table_versions "
+        "(name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)"
+    )
+    existing = set(db.get_tables())
+    for table in VERSIONED_TABLES:
+        db.execute_sql("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        if table not in existing:
+            continue
+        for sql in _version_trigger_sql(table):
+            db.execute_sql(sql)
+
+
+def sync_table_versions() -> list[str]:
+    """
+    table_versions を読み込み、他のプロセスが書き込んだテーブルに依存するキャッシュを捨てる関数
+    ユーザー・学生・教員が変わった場合はログインユーザーのキャッシュも捨てる。
+    接続の PRAGMA data_version が前回から変わっていない場合は何もしない。
+
+    Returns:
+        list[str]: バージョンが変わったテーブル名
+    """
+    conn = db.connection()
+    data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+    seen = _seen_data_versions.get(id(conn))
+    if seen is not None and seen[0] is conn and seen[1] == data_version:
+        return []
+
+    try:
+        rows = conn.execute('SELECT name, version FROM table_versions').fetchall()
+    except sqlite3.OperationalError:
+        # table_versions が無いデータベースではこのプロセスのバージョンだけを使う
+        rows = []
+
+    with _lock:
+        # 閉じた接続の記録が溜まらないよう、接続数の上限を超えたら作り直す
+        if len(_seen_data_versions) > Config.DB_MAX_CONNECTIONS * 2:
+            _seen_data_versions.clear()
+        _seen_data_versions[id(conn)] = (conn, data_version)
+
+        changed = [name for name, version in rows if _db_versions.get(name) != version]
+        for name, version in rows:
+            _db_versions[name] = version
+        if changed:
+            for entry_name in [n for n, (tables, _, _) in _entries.items() if set(tables) & set(changed)]:
+                del _entries[entry_name]
+
+    if USER_TABLES.intersection(changed):
+        invalidate_user()
+    return changed
+
+
+def register_cache_hooks(app):
+    """
+    リクエストの開始時に sync_table_versions を呼び出す処理を登録する関数
+    register_db_hooks の後に登録すること（接続を開いた後に実行するため）。
+    """
+
+    @app.before_request
+    def sync_cache_versions():
+        """
+        他のワーカーの書き込みで古くなったキャッシュを捨てる
+        """
+        sync_table_versions()
+
+
+def subject_name_map() -> dict[int, str]:
+    """
+    {科目ID: 科目名} を返す関数（subjects のバージョンが変わるまでキャッシュする）
+    """
+    from models.subject import Subject
+
+    return cached(
+        'subject_names',
+        ('subjects',),
+        lambda: dict(Subject.select(Subject.id, Subject.name).tuples()),
+    )
+
+
+def department_list() -> list[str]:
+    """
+    学生・教員・科目に登録されている専攻の一覧を返す関数（入力候補に使う）
+    """
+    from models.student import Student
+    from models.subject import Subject
+    from models.teacher import Teacher
+
+    def load():
+        query = (Student.select(Student.department.alias('department'))
+                 | Teacher.select(Teacher.department)
+                 | Subject.select(Subject.department))
+        return sorted(department for (department,) in query.tuples() if department)
+
+    return cached('departments', ('students', 'teachers', 'subjects'), load)
+
+
+def role_titles() -> Mapping[str, str]:
+    """
+    {ロール: 表示名} を返す関数
+    設定の定数でテーブルに依存しないため、キャッシュせずに読み取り専用のビューを返す。
+    """
+    return MappingProxyType(Config.ROLE_TITLES)
+
+
+def cache_stats() -> dict:
+    """
+    キャッシュごとの利用状況とテーブルのバージョンを返す関数（監視用）
+
+    Returns:
+        dict: {
+            "caches": {キャッシュ名: {hits, misses}},
+            "versions": {テーブル名: このプロセスのバージョン},
+            "db_versions": {テーブル名: table_versions のバージョン},
+        }
+    """
+    with _lock:
+        return {
+            "caches": {name: dict(stats) for name, stats in _stats.items()},
+            "versions": dict(_versions),
+            "db_versions": dict(_db_versions),
+        }
@@ -22,8 +22,8 @@ class Config:
     HOST = os.getenv("HOST", "0.0.0.0") # ホスト名
     PORT = int(os.getenv("PORT", "8000")) # ポート番号
 
-    # デバッグモード（開発時のみ True）
-    DEBUG = True
+    # デバッグモード（開発時のみ True、環境変数 DEBUG=0 で無効化。serve では常に無効）
+    DEBUG = os.getenv("DEBUG", "1").lower() in ("1", "true", "yes")
 
     # セッション設定
     SESSION_PERMANENT = False                           # セッションが期限切れになった後でも保持するかどうか
@@ -33,6 +33,48 @@ class Config:
     REMEMBER_COOKIE_HTTPONLY = True                     # クライアントサイドでのみアクセス可能
     REMEMBER_COOKIE_SECURE = True                       # httpsのみで送信
 
+    # SQLite の接続設定（接続を開くたびに PRAGMA として適用される）
+    SQLITE_PRAGMAS = {
+        'foreign_keys': 1,
+        'journal_mode': os.getenv("SQLITE_JOURNAL_MODE", "wal"),         # WAL: 書き込み中も読み込みをブロックしない
+        'synchronous': os.getenv("SQLITE_SYNCHRONOUS", "normal"),        # WAL では normal で十分
+        'busy_timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),   # ロック解除を待つ時間（ミリ秒）
+        'cache_size': int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),     # ページキャッシュ（負数は KiB 単位: 64MiB）
+        'mmap_size': int(os.getenv("SQLITE_MMAP_SIZE", "268435456")),    # メモリマップの上限（バイト: 256MiB）
+        'temp_store': os.getenv("SQLITE_TEMP_STORE", "memory"),          # 一時テーブル・ソートをメモリ上で行う
+    }
+
+    # データベース接続プールの設定
+    DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "32"))       # 1プロセスで同時に開く接続数の上限
+    DB_STALE_TIMEOUT = int(os.getenv("DB_STALE_TIMEOUT", "300"))          # この秒数を過ぎた接続は再利用せずに閉じる
+    DB_POOL_WAIT_TIMEOUT = int(os.getenv("DB_POOL_WAIT_TIMEOUT", "10"))   # 上限到達時に空きを待つ秒数
+
+    # SQL の計測（この時間以上かかった SQL をログに出力する）
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))                                       # しきい値（ミリ秒）
+    SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1").lower() in ("1", "true", "yes")    # 実行計画も出力する
+
+    # ログインユーザーのキャッシュ（user_loader の結果をプロセス内に保持する）
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))  # 保持するユーザー数の上限
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))      # 有効期限（秒）
+
+    # ログイン・ログアウト記録の書き込み（キューにためてまとめて書き込む）
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2"))  # 書き込む間隔（秒）
+    AUDIT_FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "500"))          # この件数たまったら間隔を待たずに書き込む
+    AUDIT_QUEUE_LIMIT = int(os.getenv("AUDIT_QUEUE_LIMIT", "100000"))     # 書き込みに失敗し続けた場合にキューに残す履歴の上限
+
+    # パスワードのハッシュ化（方式・コストを変えると、次回ログイン時に新しい設定でハッシュを作り直す）
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")        # werkzeug の形式（例: pbkdf2:sha256:600000）
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))  # 同時に計算する数
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))                  # 計算を待てる数（超えると 503）
+
+    # 本番用サーバー（python main.py serve）の設定
+    SERVE_WORKERS = int(os.getenv("WEB_CONCURRENCY", "0"))                 # ワーカープロセス数（0 の場合は CPU 数）
+    SERVE_THREADS = int(os.getenv("SERVE_THREADS", "4"))                   # ワーカーごとのスレッド数
+    SERVE_TIMEOUT = int(os.getenv("SERVE_TIMEOUT", "30"))                  # 応答しないワーカーを再起動するまでの秒数
+    SERVE_GRACEFUL_TIMEOUT = int(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))  # 終了・再起動時に処理中のリクエストを待つ秒数
+    SERVE_MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "0"))         # この数のリクエストを処理したワーカーを入れ替える
+    SERVE_ACCESS_LOG = os.getenv("SERVE_ACCESS_LOG", "0").lower() in ("1", "true", "yes")  # アクセスログを標準出力に出す
+
     # ユーザーロールと表示名のマッピング
     ROLE_TITLES = {
         'student': '学生',
@@ -1,4 +1,191 @@
-from peewee import SqliteDatabase
+import logging
+import re
+import threading
+import time
 
-# メインデータベース接続
-db = SqliteDatabase('database.db', pragmas={'foreign_keys': 1})
+from flask import g, has_request_context
+from playhouse.pool import PooledSqliteDatabase
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# SQL の正規化に使う正規表現（文字列・数値のリテラルと、プレースホルダの並び）
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+# EXPLAIN QUERY PLAN を出力済みの SQL（同じ SQL の実行計画は1回だけ出力する）
+_explained = set()
+_MAX_EXPLAINED = 1000
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    SQL のリテラルとプレースホルダの並びをまとめ、同じ形のクエリが同じ文字列になるようにする関数
+
+    Args:
+        sql (str): SQL
+
+    Returns:
+        str: 正規化した SQL（例: "... WHERE id IN (?, ?, ?)" → "... WHERE id IN (?, ...)"）
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('?, ...', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def request_sql_stats() -> dict | None:
+    """
+    現在のリクエストで実行した SQL の件数と合計時間を返す関数
+
+    Returns:
+        dict | None: {"count": 件数, "seconds": 合計秒数}（リクエストの外では None）
+    """
+    if not has_request_context():
+        return None
+    return g.get('sql_stats')
+
+
+class MonitoredSqliteDatabase(PooledSqliteDatabase):
+    """
+    接続プール付きの SQLite データベース。
+    スレッドごとに接続を持ち、閉じた接続はプールに戻して次のリクエストで再利用する。
+    新しく開いた接続と再利用した接続の回数を記録する。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._opened = 0
+
+    def _connect(self):
+        conn = super()._connect()
+        with self._stats_lock:
+            self._checkouts += 1
+        return conn
+
+    def execute_sql(self, sql, params=None):
+        """
+        SQL を実行し、リクエストごとの件数と時間を記録する。
+        Config.SLOW_QUERY_MS 以上かかった SQL は正規化した SQL と実行計画をログに出力する。
+        （SELECT の時間は最初の行を取得するまでで、残りの行の読み込みは含まない）
+        """
+        stats = request_sql_stats()
+        if stats is None:
+            return super().execute_sql(sql, params)
+
+        start = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["count"] += 1
+            stats["seconds"] += elapsed
+            if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+                self._log_slow_query(sql, params, elapsed)
+
+    def _log_slow_query(self, sql, params, elapsed: float):
+        """
+        遅い SQL をログに出力する（SELECT の場合は初回だけ EXPLAIN QUERY PLAN も出力する）
+        """
+        normalized = normalize_sql(sql)
+        message = f"遅いクエリ ({elapsed * 1000:.1f}ms): {normalized}"
+
+        if (Config.SLOW_QUERY_EXPLAIN and normalized not in _explained
+                and sql.lstrip().upper().startswith(('SELECT', 'WITH'))):
+            if len(_explained) >= _MAX_EXPLAINED:
+                _explained.clear()
+            _explained.add(normalized)
+            try:
+                # execute_sql を経由せずに実行し、計測・ログの対象にしない
+                plan = self.connection().execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+                message += "\n" + "\n".join(f"  {row[-1]}" for row in plan)
+            except Exception as e:
+                message += f"\n  (実行計画を取得できませんでした: {e})"
+
+        logger.warning(message)
+
+    def _add_conn_hooks(self, conn):
+        # 新しく接続を開いたときだけ呼ばれる
+        super()._add_conn_hooks(conn)
+        with self._stats_lock:
+            self._opened += 1
+
+    def connection_stats(self) -> dict:
+        """
+        接続プールの利用状況を返す。
+
+        Returns:
+            dict: {
+                opened: 新しく開いた接続の数,
+                reused: プールから再利用した回数,
+                in_use: 使用中の接続数,
+                idle: プールで待機している接続数,
+                max_connections: 接続数の上限
+            }
+        """
+        with self._stats_lock:
+            checkouts, opened = self._checkouts, self._opened
+        return {
+            "opened": opened,
+            "reused": checkouts - opened,
+            "in_use": len(self._in_use),
+            "idle": len(self._connections),
+            "max_connections": self._max_connections,
+        }
+
+
+# メインデータベース接続（PRAGMA・プールの設定は Config を参照）
+db = MonitoredSqliteDatabase(
+    'database.db',
+    pragmas=Config.SQLITE_PRAGMAS,
+    max_connections=Config.DB_MAX_CONNECTIONS,
+    stale_timeout=Config.DB_STALE_TIMEOUT,
+    timeout=Config.DB_POOL_WAIT_TIMEOUT,
+    # プールに戻した接続は別のスレッドでも再利用するため、同一スレッド検査を無効にする
+    check_same_thread=False,
+)
+
+
+def register_db_hooks(app):
+    """
+    リクエストごとにデータベース接続を開閉する処理を登録する関数
+    接続はスレッド単位でプールから取り出し、アプリケーションコンテキストの終了時にプールへ戻す。
+    あわせてリクエストごとの SQL の件数・時間を計測し、Server-Timing ヘッダーで返す。
+    """
+
+    @app.before_request
+    def open_db_connection():
+        """
+        リクエストの開始時に接続をプールから取り出し、SQL の計測を始める
+        """
+        g.request_started_at = time.perf_counter()
+        g.sql_stats = {"count": 0, "seconds": 0.0}
+        db.connect(reuse_if_open=True)
+
+    @app.after_request
+    def add_server_timing(response):
+        """
+        SQL の件数・時間とリクエスト全体の時間を Server-Timing ヘッダーに追加する
+        （ストリーミングのレスポンスでは本文を送る前までの時間）
+        """
+        stats = g.get('sql_stats')
+        if stats is not None:
+            total = (time.perf_counter() - g.request_started_at) * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats["seconds"] * 1000:.1f};desc="{stats["count"]} queries", app;dur={total:.1f}',
+            )
+        return response
+
+    @app.teardown_appcontext
+    def close_db_connection(exc):
+        """
+        アプリケーションコンテキストの終了時に接続をプールへ戻す
+        """
+        if not db.is_closed():
+            db.close()
@@ -0,0 +1,110 @@
+"""
+CSV / JSONL のストリーミング出力
+
+クエリの結果をサーバー側のカーソルから1行ずつ読み出し、ジェネレーターで少しずつ送信する。
+テーブルの大きさに関わらずメモリ使用量は一定で、最初の行はすぐに送信される。
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from urllib.parse import quote
+
+from flask import Response, abort, stream_with_context
+
+# 出力できる形式 {形式: MIME タイプ}
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# 1回に送信する行数
+EXPORT_BATCH_SIZE = 500
+
+
+def _json_default(value):
+    """
+    JSON に変換できない値（日付など）を文字列に変換する
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(columns, rows):
+    """
+    行を CSV の文字列として少しずつ返すジェネレーター
+    Excel で文字化けしないよう、先頭に BOM を付ける。
+
+    Args:
+        columns: 列名のリスト（ヘッダー行）
+        rows: 行（columns と同じ順のタプル）のイテラブル
+
+    Yields:
+        str: CSV の文字列（EXPORT_BATCH_SIZE 行ずつ）
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield '\ufeff' + buffer.getvalue()
+
+    count = 0
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(columns, rows):
+    """
+    行を JSON Lines の文字列として少しずつ返すジェネレーター
+
+    Args:
+        columns: 列名のリスト（各行のキー）
+        rows: 行（columns と同じ順のタプル）のイテラブル
+
+    Yields:
+        str: JSON Lines の文字列（EXPORT_BATCH_SIZE 行ずつ）
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines.clear()
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_response(query, columns, filename: str, fmt: str = 'csv') -> Response:
+    """
+    クエリの結果を CSV / JSONL としてストリーミングで返すレスポンスを作る関数
+
+    Args:
+        query: 出力するクエリ（columns と同じ順に列を選択したもの）
+        columns: 列名のリスト
+        filename (str): ダウンロード時のファイル名（拡張子なし）
+        fmt (str): 'csv' または 'jsonl'（それ以外は 400）
+
+    Returns:
+        Response: ストリーミングのレスポンス
+    """
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+
+    # .iterator() で結果をキャッシュせず、カーソルから1行ずつ読み出す
+    rows = query.tuples().iterator()
+    body = iter_csv(columns, rows) if fmt == 'csv' else iter_jsonl(columns, rows)
+
+    response = Response(stream_with_context(body), content_type=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}.{fmt}"
+    # プロキシでバッファリングせずにそのまま送信させる
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -2,6 +2,9 @@ from flask_login import LoginManager, AnonymousUserMixin, user_logged_in, user_l
 from flask import request
 from datetime import datetime
 
+from .audit import record_login, record_logout
+from .user_cache import invalidate_user
+
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login_page'
 
@@ -32,15 +35,19 @@ def register_login_signals(app):
     def on_user_logged_in(sender, user):
         """
         ユーザーがログインした場合の処理(ログイン日時、ログインIPアドレスの記録)
+        書き込みはキューにためて後でまとめて行う。
         """
         user.last_login = datetime.now()
         user.last_login_ip = request.remote_addr
-        user.save()
+        record_login(user.user_id, user.last_login_ip, user.last_login)
+        invalidate_user(user.user_id)
 
     @user_logged_out.connect_via(app)
     def on_user_logged_out(sender, user):
         """
         ユーザーがログアウトした場合の処理(ログアウト日時の記録)
+        書き込みはキューにためて後でまとめて行う。
         """
         user.last_logout = datetime.now()
-        user.save()
\ No newline at end of file
+        record_logout(user.user_id, user.last_logout)
+        invalidate_user(user.user_id)
\ No newline at end of file
@@ -1,4 +1,27 @@
+import json
+from datetime import datetime
+
+from peewee import SQL, Case, SelectQuery, Value, fn
+
 from models.grade import Grade
+from models.grade_summary import GradeSummary
+from .cache import bump_table_version, cached, table_version
+from .db import db
+
+# 合格とみなす最低点
+PASSING_SCORE = 60
+
+# 点数の下限と評価点の対応表（上から順に判定する）
+EVAL_THRESHOLDS = (
+    (90, 4.0),
+    (80, 3.0),
+    (70, 2.0),
+    (60, 1.0),
+)
+
+# GPA分布（ヒストグラム）の区切り
+GPA_BUCKET_EDGES = (0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0)
+
 
 def score_to_eval(score: int) -> float:
     """
@@ -10,21 +33,145 @@ def score_to_eval(score: int) -> float:
     Returns:
         float: 評価点
     """
-    if score >= 90:
-        return 4.0
-    elif score >= 80:
-        return 3.0
-    elif score >= 70:
-        return 2.0
-    elif score >= 60:
-        return 1.0
-    else:
-        return 0.0
+    for threshold, point in EVAL_THRESHOLDS:
+        if score >= threshold:
+            return point
+    return 0.0
+
+
+def eval_case(score_field=Grade.score) -> Case:
+    """
+    score_to_eval と同じ変換を SQL の CASE 式として返す関数
+
+    Args:
+        score_field: 点数のカラム（初期値は Grade.score）
+
+    Returns:
+        Case: 評価点を表す CASE 式
+    """
+    return Case(None, [(score_field >= threshold, point) for threshold, point in EVAL_THRESHOLDS], 0.0)
+
+
+def _summary_query():
+    """
+    成績テーブルから学生ごとの集計（GPA・単位数）を求めるクエリを返す関数
+
+    Returns:
+        SelectQuery: GradeSummary と同じ列順の集計クエリ
+    """
+    total_units = fn.SUM(Grade.unit)
+    weighted_points = fn.SUM(eval_case() * Grade.unit)
+    passed_units = fn.SUM(Case(None, [(Grade.score >= PASSING_SCORE, Grade.unit)], 0))
+
+    return (Grade
+            .select(
+                Grade.student_id,
+                total_units,
+                weighted_points,
+                Case(None, [(total_units > 0, fn.ROUND(weighted_points * 1.0 / total_units, 2))], 0.0),
+                passed_units,
+                total_units - passed_units,
+                Value(datetime.now()),
+            )
+            .group_by(Grade.student_id))
+
+
+SUMMARY_FIELDS = [
+    GradeSummary.student_id,
+    GradeSummary.total_units,
+    GradeSummary.weighted_points,
+    GradeSummary.gpa,
+    GradeSummary.passed_units,
+    GradeSummary.failed_units,
+    GradeSummary.updated_at,
+]
+
+
+def refresh_grade_summary(student_ids) -> None:
+    """
+    指定した学生の成績サマリーを成績テーブルから再計算する関数
+    成績を書き込んだのと同じトランザクション内で呼び出すこと。
+
+    Args:
+        student_ids: 成績が変更された学生IDのリスト
+    """
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return
+
+    # 学生IDは JSON 配列1つのパラメータとして渡し、件数が多くても1回のクエリで済ませる
+    targets = SQL('(SELECT value FROM json_each(?))', [json.dumps(student_ids, ensure_ascii=False)])
+
+    with db.atomic():
+        GradeSummary.delete().where(GradeSummary.student_id.in_(targets)).execute()
+        (GradeSummary
+         .insert_from(_summary_query().where(Grade.student_id.in_(targets)), SUMMARY_FIELDS)
+         .execute())
+
+
+def rebuild_grade_summary() -> int:
+    """
+    成績サマリーを成績テーブルから全件作り直す関数
+
+    Returns:
+        int: 作成したサマリーの件数
+    """
+    with db.atomic():
+        GradeSummary.delete().execute()
+        GradeSummary.insert_from(_summary_query(), SUMMARY_FIELDS).execute()
+    bump_grade_version()
+    return GradeSummary.select().count()
+
+
+def check_grade_summary() -> list[str]:
+    """
+    成績サマリーと成績テーブルの集計結果を比較し、ずれている学生IDを返す関数
+
+    Returns:
+        list[str]: サマリーが欠けている・余分・値が異なる学生IDのリスト
+    """
+    expected = {row[0]: row[1:6] for row in _summary_query().tuples()}
+    actual = {
+        row[0]: row[1:]
+        for row in GradeSummary.select(*SUMMARY_FIELDS[:6]).tuples()
+    }
+
+    drifted = []
+    for student_id in sorted(expected.keys() | actual.keys()):
+        exp, act = expected.get(student_id), actual.get(student_id)
+        if exp is None or act is None:
+            drifted.append(student_id)
+        elif any(abs(float(e) - float(a)) > 1e-6 for e, a in zip(exp, act)):
+            drifted.append(student_id)
+    return drifted
+
+
+def calculate_gpas(student_ids=None) -> dict[str, float]:
+    """
+    複数の学生のGPAを成績サマリーからまとめて取得する関数
+
+    Args:
+        student_ids: 対象の学生IDのリスト、または学生IDを返すサブクエリ。
+            None の場合は成績を持つ全学生が対象。
+
+    Returns:
+        dict[str, float]: {学生ID: GPA}（成績の無い学生は含まれない）
+    """
+    query = GradeSummary.select(GradeSummary.student_id, GradeSummary.gpa)
+
+    if student_ids is not None:
+        if not isinstance(student_ids, SelectQuery):
+            student_ids = list(student_ids)
+            if not student_ids:
+                return {}
+        query = query.where(GradeSummary.student_id.in_(student_ids))
+
+    return dict(query.tuples())
 
 
 def calculate_gpa(student_id: str) -> float:
     """
-    学生のGPAを計算する関数
+    学生のGPAを成績サマリーから取得する関数
 
     Args:
         student_id (str): 学生ID
@@ -32,17 +179,55 @@ def calculate_gpa(student_id: str) -> float:
     Returns:
         float: GPA
     """
-    
-    # 学生の成績を取得
-    grades = Grade.select().where(Grade.student_id == student_id)
+    summary = GradeSummary.get_or_none(GradeSummary.student_id == student_id)
+    return summary.gpa if summary else 0.0
+
+
+def bump_grade_version() -> None:
+    """
+    成績データのバージョンを進め、全体統計のキャッシュを無効化する関数
+    成績を書き込んだトランザクションのコミット後に呼び出すこと。
+    """
+    bump_table_version('grades')
+
+
+def grade_version() -> int:
+    """
+    現在の成績データのバージョンを返す関数
+
+    Returns:
+        int: 成績データのバージョン
+    """
+    return table_version('grades')
+
+
+def get_cohort_stats() -> dict:
+    """
+    全学生のGPA統計（平均・人数・分布）を返す関数
+    成績・学生のバージョンが変わるまではキャッシュした結果を返す。
+
+    Returns:
+        dict: {
+            average: GPAが0より大きい学生の平均GPA,
+            count: 集計対象の学生数,
+            histogram: {GPA範囲のラベル: 学生数}
+        }
+    """
+    # models.student は utils.db を経由して utils を読み込むため、ここで導入する
+    from models.student import Student
+    from .grade_stats import histogram
+
+    def load():
+        labels = [f"{low:.1f}~{high:.1f}" for low, high in zip(GPA_BUCKET_EDGES, GPA_BUCKET_EDGES[1:])]
+        valid_gpas = [gpa for gpa in calculate_gpas(Student.select(Student.student_id)).values() if gpa > 0]
+        total_gpa = sum(valid_gpas)
+        valid_student_count = len(valid_gpas)
 
-    # 成績を集計
-    total_units = 0
-    total_points = 0.0
-    
-    for g in grades:
-        eval_ = score_to_eval(g.score)
-        total_units += g.unit
-        total_points += eval_ * g.unit
+        return {
+            "average": round(total_gpa / valid_student_count, 2) if valid_student_count > 0 else 0.0,
+            "count": valid_student_count,
+            "histogram": dict(zip(labels, histogram(valid_gpas, GPA_BUCKET_EDGES))),
+        }
 
-    return round(total_points / total_units, 2) if total_units else 0.0
\ No newline at end of file
+    # 集計中に成績・学生が書き込まれた場合はキャッシュしない
+    return cached('cohort_stats', ('grades', 'students'), load)
@@ -0,0 +1,156 @@
+"""
+成績 CSV の一括取り込み
+
+CSV を1行ずつ読みながら検証し、一定件数ごとに1つのトランザクションで
+(学籍番号, 科目ID) の一意インデックスに対する UPSERT を行う。
+"""
+import csv
+import sys
+
+from peewee import EXCLUDED
+
+from models.grade import Grade
+from .db import db
+from .gpa import bump_grade_version, refresh_grade_summary
+
+# CSV の列（先頭行がこの列名の場合はヘッダーとして読み飛ばす）
+CSV_COLUMNS = ('student_id', 'subject_id', 'score')
+
+# 1つのトランザクションで取り込む行数
+IMPORT_CHUNK_SIZE = 10_000
+
+# エラーの詳細を返す最大件数（件数は上限を超えても数える）
+MAX_REPORTED_ERRORS = 1000
+
+
+def _upsert_sql() -> str:
+    """
+    1行分の UPSERT の SQL を返す関数
+    executemany で同じ SQL を繰り返し実行する。
+    """
+    sql, _ = (Grade
+              .insert(student_id='', subject_id=0, unit=0, score=0)
+              .on_conflict(
+                  conflict_target=[Grade.student_id, Grade.subject_id],
+                  update={Grade.unit: EXCLUDED.unit, Grade.score: EXCLUDED.score},
+              )
+              .sql())
+    return sql
+
+
+def _load_enrollments() -> dict[int, set[str]]:
+    """
+    履修登録を {科目ID: 学籍番号の集合} として読み込む関数
+    """
+    # models.enrollment は models パッケージ全体を読み込むため、ここで導入する
+    from models.enrollment import Enrollment
+
+    # 科目ごとに学籍番号を SQL 側で連結して受け取り、行ごとの変換を省く
+    cursor = db.execute_sql(
+        f"SELECT {Enrollment.subject.column_name}, group_concat(student_id, char(31)) "
+        f"FROM {Enrollment._meta.table_name} GROUP BY 1"
+    )
+    # 同じ学籍番号の文字列を科目間で共有してメモリを抑える
+    return {
+        subject_id: set(map(sys.intern, student_ids.split('\x1f')))
+        for subject_id, student_ids in cursor
+    }
+
+
+def _validate(row: list[str], credits: dict[int, int], enrolled: dict[int, set[str]]):
+    """
+    CSV の1行を検証し、取り込む値またはエラーメッセージを返す関数
+
+    Returns:
+        tuple: ((学籍番号, 科目ID, 単位数, 点数), None) または (None, エラーメッセージ)
+    """
+    if len(row) != len(CSV_COLUMNS):
+        return None, f'列の数が {len(CSV_COLUMNS)} ではありません'
+
+    student_id, subject_id, score = row
+    student_id = student_id.strip()
+    if not student_id:
+        return None, '学籍番号がありません'
+    try:
+        subject_id = int(subject_id)
+    except ValueError:
+        return None, '科目IDは数字で入力してください'
+    try:
+        score = int(score)
+    except ValueError:
+        return None, '点数は数字で入力してください'
+
+    if not (0 <= score <= 100):
+        return None, '点数は0〜100で入力してください'
+    if subject_id not in credits:
+        return None, '科目が存在しません'
+    if student_id not in enrolled.get(subject_id, ()):
+        return None, 'この学生は科目を履修していません'
+
+    # 単位は科目マスタから確定
+    return (student_id, subject_id, credits[subject_id], score), None
+
+
+def import_grades(lines, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    成績 CSV（student_id, subject_id, score）を取り込む関数
+    ファイル全体は読み込まず、chunk_size 行ごとに UPSERT と成績サマリーの更新を行う。
+
+    Args:
+        lines: CSV の各行を返すイテラブル（テキストモードのファイルなど）
+        chunk_size (int): 1つのトランザクションで取り込む行数
+
+    Returns:
+        dict: {
+            total: データ行数,
+            imported: 取り込んだ行数,
+            error_count: エラーの行数,
+            errors: [{line, student_id, subject_id, message}]（最大 MAX_REPORTED_ERRORS 件）
+        }
+    """
+    from models.subject import Subject
+
+    credits = dict(Subject.select(Subject.id, Subject.credits).tuples())
+    enrolled = _load_enrollments()
+    sql = _upsert_sql()
+
+    report = {"total": 0, "imported": 0, "error_count": 0, "errors": []}
+    chunk = []
+
+    def flush():
+        if not chunk:
+            return
+        with db.atomic():
+            db.cursor().executemany(sql, chunk)
+            refresh_grade_summary(row[0] for row in chunk)
+        report["imported"] += len(chunk)
+        chunk.clear()
+
+    try:
+        for line_number, row in enumerate(csv.reader(lines), start=1):
+            if not row or (line_number == 1 and tuple(v.strip() for v in row) == CSV_COLUMNS):
+                continue
+
+            report["total"] += 1
+            values, error = _validate(row, credits, enrolled)
+            if error:
+                report["error_count"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({
+                        "line": line_number,
+                        "student_id": row[0] if row else None,
+                        "subject_id": row[1] if len(row) > 1 else None,
+                        "message": error,
+                    })
+                continue
+
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    finally:
+        # 途中で失敗しても、コミット済みの分はキャッシュに反映させる
+        if report["imported"]:
+            bump_grade_version()
+
+    return report
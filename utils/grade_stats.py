@@ -0,0 +1,200 @@
+"""
+成績データを列ごとの NumPy 配列として扱い、統計量をまとめて計算するモジュール
+"""
+
+import numpy as np
+
+from .db import db
+from .cache import cached
+from .gpa import EVAL_THRESHOLDS
+
+# 評価点の変換表（点数の下限を昇順に並べたもの）
+_EVAL_LOWER_BOUNDS = np.array(sorted(threshold for threshold, _ in EVAL_THRESHOLDS))
+_EVAL_POINTS = np.array([0.0] + [point for _, point in sorted(EVAL_THRESHOLDS)])
+# 科目ID と点数を1つの並べ替えキーにまとめるときの基数（点数の上限より大きい値）
+_SCORE_RADIX = 1000
+# 成績テーブルの1行を読み込む型（学生IDは出現順の番号に置き換える）
+_ROW_DTYPE = np.dtype([('student', np.int64), ('subject_id', np.int64), ('unit', np.int64), ('score', np.int64)])
+
+
+def histogram(values, edges) -> list[int]:
+    """
+    値を区切りごとに数える関数
+    最後の区間だけは上限を含む（例: 4.0 は 3.5~4.0 に入る）。
+
+    Args:
+        values: 集計する値
+        edges: 区切りの値（昇順）
+
+    Returns:
+        list[int]: 各区間の件数
+    """
+    counts, _ = np.histogram(np.asarray(values, dtype=float), bins=np.asarray(edges, dtype=float))
+    return counts.tolist()
+
+
+class GradeColumns:
+    """
+    成績テーブルを列ごとの配列として保持するクラス。
+
+    Attributes:
+        student_ids (np.ndarray): 学生IDの一覧（student_index の番号に対応）
+        student_index (np.ndarray): 各成績の学生番号
+        subject_id (np.ndarray): 各成績の科目ID
+        unit (np.ndarray): 各成績の単位数
+        score (np.ndarray): 各成績の点数
+    """
+
+    def __init__(self, student_ids, student_index, subject_id, unit, score):
+        self.student_ids = student_ids
+        self.student_index = student_index
+        self.subject_id = subject_id
+        self.unit = unit
+        self.score = score
+        self._subject_groups = None
+
+    def __len__(self):
+        return len(self.score)
+
+    @classmethod
+    def load(cls) -> "GradeColumns":
+        """
+        成績テーブルを1回のクエリで読み込む。
+        カーソルの行を np.fromiter で件数分の配列に直接書き込み、
+        テーブル全体を文字列や行のリストとして保持しない。
+
+        Returns:
+            GradeColumns: 読み込んだ成績データ
+        """
+        # {学生ID: 出現順の番号}
+        codes = {}
+        code = codes.setdefault
+
+        # 件数と行を同じスナップショットから読むため、1つのトランザクションで実行する
+        with db.atomic():
+            size = db.execute_sql("SELECT count(*) FROM grades").fetchone()[0]
+            cursor = db.execute_sql("SELECT student_id, subject_id, unit, score FROM grades")
+            rows = np.fromiter(
+                ((code(student_id, len(codes)), subject_id, unit, score)
+                 for student_id, subject_id, unit, score in cursor),
+                dtype=_ROW_DTYPE,
+                count=size,
+            )
+
+        # 学生IDの昇順に番号を振り直す
+        student_ids = np.array(list(codes), dtype=object)
+        order = np.argsort(student_ids)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        return cls(
+            student_ids=student_ids[order],
+            student_index=rank[rows['student']],
+            subject_id=rows['subject_id'].copy(),
+            unit=rows['unit'].copy(),
+            score=rows['score'].copy(),
+        )
+
+    def eval_points(self) -> np.ndarray:
+        """
+        各成績の点数を評価点に変換する。
+
+        Returns:
+            np.ndarray: 評価点
+        """
+        return _EVAL_POINTS[np.searchsorted(_EVAL_LOWER_BOUNDS, self.score, side='right')]
+
+    def gpa(self) -> dict[str, float]:
+        """
+        学生ごとのGPAを計算する。
+
+        Returns:
+            dict[str, float]: {学生ID: GPA}
+        """
+        size = len(self.student_ids)
+        units = np.bincount(self.student_index, weights=self.unit, minlength=size)
+        points = np.bincount(self.student_index, weights=self.eval_points() * self.unit, minlength=size)
+        gpas = np.round(np.divide(points, units, out=np.zeros(size), where=units > 0), 2)
+        return dict(zip(self.student_ids.tolist(), gpas.tolist()))
+
+    def _group_by_subject(self):
+        """
+        科目ID・点数の順に並べ替え、科目ごとの開始位置と件数を返す。
+        点数は 0〜100 なので、科目ID と点数を1つの整数キーにまとめて並べ替える。
+        """
+        if self._subject_groups is None:
+            keys = np.sort(self.subject_id * _SCORE_RADIX + self.score)
+            subject_id, score = np.divmod(keys, _SCORE_RADIX)
+            subjects, starts, counts = np.unique(subject_id, return_index=True, return_counts=True)
+            self._subject_groups = (subjects, starts, counts, score.astype(float))
+        return self._subject_groups
+
+    @staticmethod
+    def _quantiles(score, starts, counts, q: float) -> np.ndarray:
+        """
+        並べ替え済みの点数から、科目ごとの分位点を線形補間で求める。
+        """
+        position = starts + q * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        return score[lower] + (score[upper] - score[lower]) * (position - lower)
+
+    def subject_stats(self) -> dict[int, dict]:
+        """
+        科目ごとの件数・平均・最小・最大・中央値・標準偏差を計算する。
+
+        Returns:
+            dict[int, dict]: {科目ID: {count, mean, min, max, median, std}}
+        """
+        if not len(self):
+            return {}
+
+        subjects, starts, counts, score = self._group_by_subject()
+        sums = np.add.reduceat(score, starts)
+        squares = np.add.reduceat(score * score, starts)
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+
+        stats = {
+            "count": counts,
+            "mean": means,
+            "min": score[starts],
+            "max": score[starts + counts - 1],
+            "median": self._quantiles(score, starts, counts, 0.5),
+            "std": stds,
+        }
+        return {
+            int(subject): {key: values[i].item() for key, values in stats.items()}
+            for i, subject in enumerate(subjects)
+        }
+
+    def subject_percentiles(self, percents) -> dict[int, list[float]]:
+        """
+        科目ごとの点数のパーセンタイルを計算する。
+
+        Args:
+            percents: 求めるパーセンタイル（0〜100）のリスト
+
+        Returns:
+            dict[int, list[float]]: {科目ID: percents と同じ順のパーセンタイル値}
+        """
+        if not len(self):
+            return {}
+
+        subjects, starts, counts, score = self._group_by_subject()
+        columns = [self._quantiles(score, starts, counts, p / 100.0) for p in percents]
+        return {
+            int(subject): [float(column[i]) for column in columns]
+            for i, subject in enumerate(subjects)
+        }
+
+
+def get_grade_columns() -> GradeColumns:
+    """
+    成績データの列を返す関数
+    成績データのバージョンが変わるまでは読み込んだ配列を使い回す。
+
+    Returns:
+        GradeColumns: 成績データ
+    """
+    return cached('grade_columns', ('grades',), GradeColumns.load)
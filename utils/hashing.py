@@ -0,0 +1,117 @@
+"""
+パスワードのハッシュ化と検証
+
+ハッシュの計算は CPU を多く使うため、リクエストのスレッドでは行わず専用のスレッドプールで実行する。
+同時に計算する数（PASSWORD_HASH_WORKERS）と待たせる数（PASSWORD_HASH_QUEUE）に上限を設け、
+上限を超えた場合は待たずに HashingBusy を送出する（ログインが集中しても他の画面が止まらないようにする）。
+hashlib の scrypt / pbkdf2 は計算中に GIL を解放するため、スレッドでも並列に実行される。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .config import Config
+
+_executor = None
+_executor_pid = None
+# 計算中と待機中を合わせた数の上限
+_slots = None
+_executor_lock = threading.Lock()
+
+
+class HashingBusy(RuntimeError):
+    """
+    ハッシュ計算の待ち行列が上限に達した場合に送出される例外
+    """
+
+
+def hash_password(raw_password: str, method: str | None = None) -> str:
+    """
+    パスワードをハッシュ化する関数（呼び出したスレッドで計算する）
+
+    Args:
+        raw_password (str): 平文パスワード
+        method (str | None): ハッシュ方式（省略時は Config.PASSWORD_HASH_METHOD）
+
+    Returns:
+        str: ハッシュ化されたパスワード
+    """
+    return generate_password_hash(raw_password, method=method or Config.PASSWORD_HASH_METHOD)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    """
+    ハッシュ方式を保存される形式に正規化する（例: 'scrypt' → 'scrypt:32768:8:1'）
+    """
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    保存されたハッシュが現在の設定と異なる方式・コストで作られているかを判定する関数
+
+    Args:
+        password_hash (str): 保存されたハッシュ
+
+    Returns:
+        bool: 作り直す必要がある場合 True
+    """
+    return password_hash.split('$', 1)[0] != _method_prefix(Config.PASSWORD_HASH_METHOD)
+
+
+def _get_executor():
+    """
+    ハッシュ計算用のスレッドプールを返す（fork 後の子プロセスでは作り直す）
+    """
+    global _executor, _executor_pid, _slots
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS,
+                                           thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(Config.PASSWORD_HASH_WORKERS + Config.PASSWORD_HASH_QUEUE)
+            _executor_pid = os.getpid()
+        return _executor, _slots
+
+
+def run_hashing(func, *args):
+    """
+    ハッシュの計算をスレッドプールで実行し、結果を待って返す関数
+
+    Args:
+        func: 実行する関数（check_password_hash など）
+        *args: 関数に渡す引数
+
+    Returns:
+        関数の戻り値
+
+    Raises:
+        HashingBusy: 待ち行列が上限に達している場合
+    """
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy("パスワードの検証が混み合っています")
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def verify_password_hash(password_hash: str, raw_password: str) -> bool:
+    """
+    パスワードをハッシュと照合する関数（スレッドプールで計算する）
+
+    Args:
+        password_hash (str): 保存されたハッシュ
+        raw_password (str): 入力された平文パスワード
+
+    Returns:
+        bool: 一致する場合 True
+
+    Raises:
+        HashingBusy: 待ち行列が上限に達している場合
+    """
+    return run_hashing(check_password_hash, password_hash, raw_password)
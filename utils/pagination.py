@@ -0,0 +1,148 @@
+"""
+キーセット（シーク）方式のページネーション
+"""
+import base64
+import binascii
+import json
+
+from flask import abort, make_response
+from peewee import Tuple
+
+
+def encode_cursor(values) -> str:
+    """
+    並び順のキーの値を URL に載せられる不透明な文字列に変換する関数
+
+    Args:
+        values: 最後に返した行のキーの値
+
+    Returns:
+        str: カーソル文字列
+    """
+    raw = json.dumps(list(values), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+# カーソルに入れられる値（SQLite にそのまま渡せる型）
+_CURSOR_TYPES = (str, int, float, type(None))
+_SQLITE_INT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _load_cursor(cursor: str) -> list:
+    """
+    カーソル文字列を JSON の配列に戻す（不正な場合は ValueError）
+    """
+    if not isinstance(cursor, str):
+        raise ValueError('カーソルが文字列ではありません')
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError('カーソルを読み込めません') from e
+    if not isinstance(values, list):
+        raise ValueError('カーソルが配列ではありません')
+    return values
+
+
+def decode_cursor(cursor: str, length: int | None = None) -> list:
+    """
+    encode_cursor で作ったカーソル文字列をキーの値に戻す関数
+
+    Args:
+        cursor (str): カーソル文字列
+        length (int | None): キーの数（指定した場合は値の数を検証する）
+
+    Returns:
+        list: キーの値
+
+    Raises:
+        ValueError: カーソルが不正な場合（値が文字列・数値・null 以外、数が合わないなど）
+    """
+    values = _load_cursor(cursor)
+    if length is not None and len(values) != length:
+        raise ValueError('カーソルの値の数が並び順のキーと一致しません')
+    for value in values:
+        if not isinstance(value, _CURSOR_TYPES):
+            raise ValueError('カーソルに使えない値が含まれています')
+        if isinstance(value, int) and not _SQLITE_INT_RANGE[0] <= value <= _SQLITE_INT_RANGE[1]:
+            raise ValueError('カーソルの数値が範囲外です')
+    return values
+
+
+def decode_cursor_map(cursor: str, names) -> dict:
+    """
+    [[名前, カーソル], ...] の形のカーソル文字列を {名前: カーソル} に戻す関数
+    複数のクエリを続けてページングする場合（ユーザー一覧の学生・教員など）に使う。
+
+    Args:
+        cursor (str): カーソル文字列
+        names: 使える名前
+
+    Returns:
+        dict: {名前: そのクエリの次ページのカーソル}
+
+    Raises:
+        ValueError: カーソルが不正な場合
+    """
+    pending = {}
+    for entry in _load_cursor(cursor):
+        if not (isinstance(entry, list) and len(entry) == 2
+                and entry[0] in names and isinstance(entry[1], str)):
+            raise ValueError('カーソルの形式が不正です')
+        pending[entry[0]] = entry[1]
+    return pending
+
+
+def _key_values(item, fields) -> list:
+    """
+    行（モデルまたは .dicts() の辞書）からキーの値を取り出す。
+    外部キーは参照先を読み込まずに値だけを使う。
+    """
+    data = item if isinstance(item, dict) else item.__data__
+    return [data[field.name] for field in fields]
+
+
+def paginate(query, fields, cursor: str | None, limit: int = 50):
+    """
+    クエリをキーの昇順に並べ、カーソルの次の行から limit 件を取得する関数
+    OFFSET を使わないため、どのページでも取得コストが変わらない。
+
+    Args:
+        query: 絞り込み済みのクエリ
+        fields: 並び順のキー（一意になる組み合わせ）
+        cursor (str | None): 前のページで返したカーソル（最初のページは None。不正な場合は 400 を返す）
+        limit (int): 1ページの件数
+
+    Returns:
+        tuple[list, str | None]: (取得した行, 次のページのカーソル。最後のページなら None)
+    """
+    if cursor:
+        try:
+            values = decode_cursor(cursor, len(fields))
+        except ValueError:
+            abort(400)
+        query = query.where(Tuple(*fields) > Tuple(*values))
+
+    items = list(query.order_by(*[field.asc() for field in fields]).limit(limit + 1))
+
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(_key_values(items[-1], fields))
+
+
+def rows_response(html: str, next_cursor: str | None):
+    """
+    無限スクロール用の行HTMLに、次のページのカーソルをヘッダーとして付けて返す関数
+
+    Args:
+        html (str): 描画済みの行HTML
+        next_cursor (str | None): 次のページのカーソル
+
+    Returns:
+        Response: X-Next-Cursor ヘッダー付きのレスポンス
+    """
+    response = make_response(html)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -0,0 +1,248 @@
+"""
+ユーザーの一括登録
+
+パスワードのハッシュ化は意図的に遅い処理のため、コマンドラインからはプロセスプールで全 CPU に分散し、
+Web のリクエストからはログインの検証と同じスレッドプール（utils.hashing）で上限を守って計算する。
+User・学生/教員・パスワードの3テーブルは1つのトランザクションで insert_many する。
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from peewee import SQL, chunked
+
+from .db import db
+from .cache import bump_table_version
+from .hashing import hash_password, run_hashing
+
+# CSV の列（ヘッダー行が必要）
+USER_COLUMNS = ('user_id', 'role', 'name', 'birth_date', 'gender', 'department', 'grade', 'password')
+
+# 一括登録できるロール
+PROVISION_ROLES = ('student', 'teacher')
+
+# この件数未満ならプロセスプールを使わずにハッシュ化する（プロセス起動の方が遅いため）
+MIN_PARALLEL_HASHES = 16
+
+# 1回の INSERT で登録する行数
+INSERT_BATCH_SIZE = 500
+
+
+def read_user_rows(lines, fmt: str = 'csv') -> list[dict]:
+    """
+    CSV または JSON のユーザー一覧を辞書のリストとして読み込む関数
+
+    Args:
+        lines: テキストモードのファイルなど
+        fmt (str): 'csv' / 'json'（配列、または {"users": [...]}）/ 'jsonl'（1行1ユーザー）
+
+    Returns:
+        list[dict]: ユーザーごとの辞書
+    """
+    if fmt == 'json':
+        data = json.load(lines)
+        return data.get('users', []) if isinstance(data, dict) else data
+    if fmt == 'jsonl':
+        return [json.loads(line) for line in lines if line.strip()]
+    return list(csv.DictReader(lines))
+
+
+def _validate(row, existing: set[str], seen: set[str]):
+    """
+    ユーザー1件を検証し、登録する値またはエラーメッセージを返す関数
+
+    Returns:
+        tuple: (正規化した辞書, None) または (None, エラーメッセージ)
+    """
+    if not isinstance(row, dict):
+        return None, 'ユーザーの形式が正しくありません'
+
+    user = {column: (str(row.get(column) or '')).strip() for column in USER_COLUMNS}
+    user_id = user['user_id']
+
+    if not user_id:
+        return None, 'ユーザーIDがありません'
+    if user['role'] not in PROVISION_ROLES:
+        return None, 'ロールは student または teacher を指定してください'
+    if not user['name']:
+        return None, '氏名がありません'
+    if not user['password']:
+        return None, 'パスワードがありません'
+    if user_id in existing:
+        return None, 'このユーザーIDはすでに登録されています'
+    if user_id in seen:
+        return None, 'ユーザーIDが重複しています'
+
+    if user['birth_date']:
+        try:
+            user['birth_date'] = date.fromisoformat(user['birth_date'])
+        except ValueError:
+            return None, '生年月日は YYYY-MM-DD で入力してください'
+
+    # 空欄は NULL として保存する
+    for column in ('birth_date', 'gender', 'department', 'grade'):
+        user[column] = user[column] or None
+    return user, None
+
+
+def _existing_user_ids(user_ids) -> set[str]:
+    """
+    登録済みのユーザーIDを1回のクエリで取得する関数
+    """
+    from models.user import User
+
+    if not user_ids:
+        return set()
+    targets = SQL('(SELECT value FROM json_each(?))', [json.dumps(list(user_ids), ensure_ascii=False)])
+    return {row[0] for row in User.select(User.user_id).where(User.user_id.in_(targets)).tuples()}
+
+
+def hash_passwords(passwords: list[str], workers: int | None = None, progress=None) -> list[str]:
+    """
+    パスワードをプロセスプールで並列にハッシュ化する関数
+
+    Args:
+        passwords (list[str]): 平文パスワードのリスト
+        workers (int | None): プロセス数（None の場合は CPU 数）
+        progress: 進捗を受け取る関数 progress(完了件数, 全件数)
+
+    Returns:
+        list[str]: passwords と同じ順のハッシュ
+    """
+    total = len(passwords)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or total < MIN_PARALLEL_HASHES:
+        hashes = []
+        for password in passwords:
+            hashes.append(hash_password(password))
+            if progress:
+                progress(len(hashes), total)
+        return hashes
+
+    # 1回の受け渡しを大きくしてプロセス間通信の回数を減らす（各プロセスに数回ずつ割り当てる）
+    chunksize = max(1, total // (workers * 4))
+    hashes = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for password_hash in executor.map(hash_password, passwords, chunksize=chunksize):
+            hashes.append(password_hash)
+            if progress and (len(hashes) % chunksize == 0 or len(hashes) == total):
+                progress(len(hashes), total)
+    return hashes
+
+
+def hash_passwords_bounded(passwords: list[str]) -> list[str]:
+    """
+    パスワードをハッシュ計算用のスレッドプール（utils.hashing）で1件ずつハッシュ化する関数
+    リクエストの処理中に使う（プロセスを fork せず、ログインの検証と同じ上限の中で計算する）。
+
+    Args:
+        passwords (list[str]): 平文パスワードのリスト
+
+    Returns:
+        list[str]: passwords と同じ順のハッシュ
+
+    Raises:
+        HashingBusy: 待ち行列が上限に達している場合
+    """
+    return [run_hashing(hash_password, password) for password in passwords]
+
+
+def provision_users(rows, workers: int | None = None, progress=None, bounded: bool = False) -> dict:
+    """
+    ユーザーを一括で登録する関数
+    不正な行は登録せずにエラーとして返し、正しい行だけを1つのトランザクションで登録する。
+
+    Args:
+        rows: ユーザーの辞書のリスト（read_user_rows の戻り値など）
+        workers (int | None): ハッシュ化に使うプロセス数（None の場合は CPU 数）
+        progress: ハッシュ化の進捗を受け取る関数 progress(完了件数, 全件数)
+        bounded (bool): True の場合はプロセスプールを使わず hash_passwords_bounded でハッシュ化する
+            （Web のリクエストから呼び出す場合に指定する）
+
+    Returns:
+        dict: {
+            total: 件数,
+            created: 登録した件数,
+            errors: [{index, user_id, message}],
+            hash_seconds: ハッシュ化の秒数,
+            insert_seconds: 登録の秒数,
+            users_per_sec: 1秒あたりの登録件数
+        }
+    """
+    # models は utils.db を経由して utils を読み込むため、ここで導入する
+    from models.password import Password
+    from models.student import Student
+    from models.teacher import Teacher
+    from models.user import User
+
+    rows = list(rows)
+    start = time.perf_counter()
+    existing = _existing_user_ids(
+        {str(row.get('user_id') or '').strip() for row in rows if isinstance(row, dict)} - {''}
+    )
+
+    users, errors, seen = [], [], set()
+    for index, row in enumerate(rows):
+        user, error = _validate(row, existing, seen)
+        if error:
+            errors.append({
+                "index": index,
+                "user_id": row.get('user_id') if isinstance(row, dict) else None,
+                "message": error,
+            })
+            continue
+        seen.add(user['user_id'])
+        users.append(user)
+
+    hash_start = time.perf_counter()
+    passwords = [user['password'] for user in users]
+    if bounded:
+        hashes = hash_passwords_bounded(passwords)
+    else:
+        hashes = hash_passwords(passwords, workers=workers, progress=progress)
+    insert_start = time.perf_counter()
+
+    with db.atomic():
+        for batch in chunked(zip(users, hashes), INSERT_BATCH_SIZE):
+            User.insert_many(
+                [(user['user_id'], user['role']) for user, _ in batch],
+                fields=[User.user_id, User.role],
+            ).execute()
+
+            students = [user for user, _ in batch if user['role'] == 'student']
+            teachers = [user for user, _ in batch if user['role'] == 'teacher']
+            if students:
+                Student.insert_many([
+                    (u['user_id'], u['name'], u['birth_date'], u['gender'], u['department'], u['grade'])
+                    for u in students
+                ], fields=[Student.student_id, Student.name, Student.birth_date,
+                           Student.gender, Student.department, Student.grade]).execute()
+            if teachers:
+                Teacher.insert_many([
+                    (u['user_id'], u['name'], u['birth_date'], u['gender'], u['department'])
+                    for u in teachers
+                ], fields=[Teacher.teacher_id, Teacher.name, Teacher.birth_date,
+                           Teacher.gender, Teacher.department]).execute()
+
+            Password.insert_many(
+                [(user['user_id'], password_hash, user['role']) for user, password_hash in batch],
+                fields=[Password.user_id, Password.password_hash, Password.role],
+            ).execute()
+    end = time.perf_counter()
+
+    # 学生が増えると全体統計・専攻の一覧も変わるため、キャッシュを無効化する
+    if users:
+        bump_table_version('users', 'students', 'teachers')
+
+    return {
+        "total": len(rows),
+        "created": len(users),
+        "errors": errors,
+        "hash_seconds": round(insert_start - hash_start, 3),
+        "insert_seconds": round(end - insert_start, 3),
+        "users_per_sec": round(len(users) / (end - start), 1) if end > start else 0.0,
+    }
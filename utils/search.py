@@ -0,0 +1,144 @@
+"""
+FTS5（trigram トークナイザ）による部分一致検索
+
+学生・教員・科目のテーブルごとに外部コンテンツ型の FTS5 テーブルを作り、
+トリガーで元のテーブルと同期する。trigram は3文字単位で索引を作るため、
+日本語の氏名や学籍番号の一部でも検索できる。
+3文字未満のキーワードや FTS5 が使えない環境では LIKE による検索に切り替える。
+"""
+import operator
+from functools import reduce
+
+from peewee import SQL, OperationalError
+
+from .db import db
+
+# trigram で索引を使える最短のキーワード長
+MIN_TRIGRAM_LENGTH = 3
+
+# {元のテーブル名: (FTS5 テーブル名, 元のテーブルの rowid 列, 索引を作る列)}
+SEARCH_INDEXES = {
+    'students': ('students_fts', 'rowid', ('student_id', 'name')),
+    'teachers': ('teachers_fts', 'rowid', ('teacher_id', 'name')),
+    'subjects': ('subjects_fts', 'id', ('name', 'department', 'day')),
+}
+
+# FTS5 テーブルの有無のキャッシュ {(データベースのパス, FTS5 テーブル名): 有無}
+_available = {}
+
+
+def _index_sql(table: str) -> list[str]:
+    """
+    FTS5 テーブルと同期用トリガーを作成する SQL を返す関数
+
+    Args:
+        table (str): 元のテーブル名
+
+    Returns:
+        list[str]: 実行する SQL のリスト
+    """
+    fts, rowid, columns = SEARCH_INDEXES[table]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    content_rowid = f", content_rowid='{rowid}'" if rowid != 'rowid' else ''
+    insert = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.{rowid}, {new_values});"
+    delete = (f"INSERT INTO {fts}({fts}, rowid, {column_list}) "
+              f"VALUES ('delete', old.{rowid}, {old_values});")
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table}'{content_rowid}, tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def create_search_indexes() -> bool:
+    """
+    検索用の FTS5 テーブルとトリガーを作成し、既存の行から索引を作る関数
+    SQLite が FTS5 の trigram に対応していない場合は何もしない。
+
+    Returns:
+        bool: 作成できた場合は True
+    """
+    _available.clear()
+    try:
+        with db.atomic():
+            for table in SEARCH_INDEXES:
+                for sql in _index_sql(table):
+                    db.execute_sql(sql)
+    except OperationalError:
+        return False
+
+    rebuild_search_indexes()
+    return True
+
+
+def rebuild_search_indexes() -> None:
+    """
+    FTS5 の索引を元のテーブルから作り直す関数
+    rowid が振り直される VACUUM の後などに実行する。
+    """
+    with db.atomic():
+        for fts, _, _ in SEARCH_INDEXES.values():
+            if search_available(fts):
+                db.execute_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def search_available(fts: str) -> bool:
+    """
+    FTS5 テーブルが作成済みかどうかを返す関数
+
+    Args:
+        fts (str): FTS5 テーブル名
+
+    Returns:
+        bool: 作成済みの場合は True
+    """
+    key = (db.database, fts)
+    if key not in _available:
+        _available[key] = db.table_exists(fts)
+    return _available[key]
+
+
+def _match_expression(keyword: str, columns) -> str:
+    """
+    キーワードを FTS5 の MATCH 式に変換する関数
+    キーワード全体を1つのフレーズとして扱うため、LIKE '%keyword%' と同じ結果になる。
+    """
+    phrase = '"' + keyword.replace('"', '""') + '"'
+    if columns:
+        return '{' + ' '.join(columns) + '} : ' + phrase
+    return phrase
+
+
+def keyword_filter(model, keyword: str, columns=None):
+    """
+    キーワードを部分一致で含む行を絞り込む条件を返す関数
+
+    Args:
+        model: 検索するモデル（Student / Teacher / Subject）
+        keyword (str): 検索キーワード
+        columns: 検索する列名のリスト（None の場合は索引を作ったすべての列）
+
+    Returns:
+        Expression: where() に渡す条件
+    """
+    table = model._meta.table_name
+    fts, rowid, indexed = SEARCH_INDEXES[table]
+    columns = list(columns or indexed)
+
+    if len(keyword) >= MIN_TRIGRAM_LENGTH and search_available(fts):
+        key = model._meta.primary_key
+        selected = 'rowid' if rowid != 'rowid' else key.column_name
+        return key.in_(SQL(
+            f'(SELECT {selected} FROM {fts} WHERE {fts} MATCH ?)',
+            [_match_expression(keyword, columns)],
+        ))
+
+    # trigram で検索できない短いキーワードは LIKE で検索する
+    return reduce(operator.or_, [model._meta.columns[column].contains(keyword) for column in columns])
@@ -0,0 +1,105 @@
+"""
+本番用のアプリケーションサーバー（gunicorn）
+
+アプリケーションをマスタープロセスで1回だけ読み込み（preload）、CPU 数に応じたワーカープロセスを fork する。
+各ワーカーは複数のスレッドでリクエストを処理し、1つの待ち受けソケットを共有する。
+マスターは fork する前にデータベース接続をすべて閉じ（SQLite の接続は fork をまたいで使えないため）、
+各ワーカーは自分の接続を開き直す。
+
+SIGHUP で設定を読み込み直してワーカーを順に入れ替え、SIGTERM で処理中のリクエストを待ってから終了する。
+gunicorn は Linux / macOS でのみ動作する（Windows では python main.py の開発用サーバーを使う）。
+"""
+import os
+
+from .audit import flush_audit
+from .config import Config
+from .db import db
+
+
+def default_workers() -> int:
+    """
+    ワーカープロセス数の既定値を返す関数（Config.SERVE_WORKERS、未設定なら CPU 数）
+
+    Returns:
+        int: ワーカープロセス数
+    """
+    return Config.SERVE_WORKERS or os.cpu_count() or 1
+
+
+def _close_connections() -> None:
+    """
+    このスレッドの接続とプールの接続をすべて閉じる
+    """
+    if not db.is_closed():
+        db.close()
+    db.close_all()
+
+
+def _on_starting(server):
+    """
+    マスターがワーカーを fork する前の処理（initialize_database などで開いた接続を閉じる）
+    """
+    _close_connections()
+
+
+def _post_fork(server, worker):
+    """
+    ワーカーを fork した直後の処理
+    マスターは fork 前に接続を閉じているが、念のため引き継いだ接続が残っていれば閉じる。
+    """
+    _close_connections()
+
+
+def _worker_exit(server, worker):
+    """
+    ワーカーの終了時の処理（キューに残ったログイン記録を書き込み、接続を閉じる）
+    """
+    try:
+        flush_audit()
+    finally:
+        db.close_all()
+
+
+def serve(app, host: str, port: int, workers: int | None = None, threads: int | None = None) -> None:
+    """
+    gunicorn でアプリケーションを起動する関数（終了するまで戻らない）
+
+    Args:
+        app: Flask アプリケーション
+        host (str): 待ち受けるホスト
+        port (int): 待ち受けるポート番号
+        workers (int | None): ワーカープロセス数（None の場合は default_workers()）
+        threads (int | None): ワーカーごとのスレッド数（None の場合は Config.SERVE_THREADS）
+    """
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers or default_workers(),
+        'threads': threads or Config.SERVE_THREADS,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'timeout': Config.SERVE_TIMEOUT,
+        'graceful_timeout': Config.SERVE_GRACEFUL_TIMEOUT,
+        # 一定数のリクエストを処理したワーカーを順に入れ替える（0 の場合は入れ替えない）
+        'max_requests': Config.SERVE_MAX_REQUESTS,
+        'max_requests_jitter': Config.SERVE_MAX_REQUESTS // 10,
+        'accesslog': '-' if Config.SERVE_ACCESS_LOG else None,
+        'on_starting': _on_starting,
+        'post_fork': _post_fork,
+        'worker_exit': _worker_exit,
+    }
+
+    class Application(BaseApplication):
+        """
+        設定をコードから渡すための gunicorn のアプリケーション
+        """
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
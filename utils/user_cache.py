@@ -0,0 +1,95 @@
+"""
+ログインユーザーのキャッシュ
+
+Flask-Login の user_loader はリクエストのたびに呼ばれるため、
+ユーザーとプロフィールのスナップショットをプロセス内に保持し、毎回の SELECT を省く。
+件数の上限（LRU）と有効期限（TTL）を設け、ユーザー情報の更新・削除・ログイン・ログアウト時に無効化する。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from .config import Config
+
+# {user_id: (有効期限, users テーブルの行, プロフィールの辞書)}（古く使われたものが先頭）
+_entries = OrderedDict()
+_lock = threading.Lock()
+# 無効化のたびに増える世代（読み込み中に無効化された結果を保存しないために使う）
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _build_user(data: dict, profile: dict):
+    """
+    スナップショットから User を組み立てる（リクエストごとに別のインスタンスを返す）
+    """
+    from models.user import User
+
+    user = User(**data)
+    user._dirty.clear()
+    user._profile_dict = dict(profile)
+    return user
+
+
+def load_cached_user(user_id: str):
+    """
+    ユーザーをキャッシュから取得する関数（無い・期限切れの場合はデータベースから読み込んで保存する）
+
+    Args:
+        user_id (str): ユーザーID
+
+    Returns:
+        User | None: ユーザー（存在しない場合は None）
+    """
+    from models.user import User
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and entry[0] > now:
+            _entries.move_to_end(user_id)
+            _stats["hits"] += 1
+            return _build_user(entry[1], entry[2])
+        _entries.pop(user_id, None)
+        _stats["misses"] += 1
+        generation = _generation
+
+    user = User.get_or_none(User.user_id == user_id)
+    if user is None:
+        return None
+    profile = user.profile_dict()
+
+    with _lock:
+        if generation == _generation:
+            _entries[user_id] = (now + Config.USER_CACHE_TTL, dict(user.__data__), dict(profile))
+            while len(_entries) > Config.USER_CACHE_SIZE:
+                _entries.popitem(last=False)
+    return user
+
+
+def invalidate_user(user_id: str | None = None) -> None:
+    """
+    ユーザーのキャッシュを無効化する関数
+
+    Args:
+        user_id (str | None): 無効化するユーザーID（None の場合は全件）
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        _stats["invalidations"] += 1
+        if user_id is None:
+            _entries.clear()
+        else:
+            _entries.pop(user_id, None)
+
+
+def user_cache_stats() -> dict:
+    """
+    キャッシュの利用状況を返す関数（監視用）
+
+    Returns:
+        dict: 件数・ヒット数・ミス数・無効化回数
+    """
+    with _lock:
+        return dict(_stats, size=len(_entries))